@@ -0,0 +1,202 @@
+import time
+
+import numpy as np
+
+# Day-count conventions: how many days an interval has and how many make a year
+#   actual/365     calendar days over a fixed 365-day year
+#   actual/360     calendar days over a 360-day year (money-market basis)
+#   actual/actual  calendar days, each over the length of its own year (ISDA)
+#   30/360         months of 30 days over a 360-day year (US bond basis)
+DAY_COUNT_CONVENTIONS = ('actual/365', 'actual/360', 'actual/actual', '30/360')
+
+# daily: interest compounds every day; simple: interest accrues linearly
+# between payments and is added to the balance on each payment date
+COMPOUNDING = ('daily', 'simple')
+
+
+def check_convention(convention: str, compounding: str):
+    if convention not in DAY_COUNT_CONVENTIONS:
+        raise ValueError(f"Unknown day-count convention: {convention}")
+    if compounding not in COMPOUNDING:
+        raise ValueError(f"Unknown compounding: {compounding}")
+
+
+def _leap_days_before(dates: np.ndarray) -> np.ndarray:
+    """Days from 1970-01-01 up to each date that fall in leap years (negative before 1970)"""
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    previous = years - 1
+
+    # Leap years in [1970, year): Gregorian leap years up to year - 1, minus those up to 1969
+    leap_years = (previous // 4 - previous // 100 + previous // 400) - (1969 // 4 - 1969 // 100 + 1969 // 400)
+    is_leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    day_of_year = (dates - dates.astype('datetime64[Y]')).astype(np.int64)
+    return 366 * leap_years + np.where(is_leap, day_of_year, 0)
+
+
+def _days_30_360(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """30/360 bond basis day count: day 31 counts as 30, and so does an end on the 31st after a start on the 30th"""
+    def parts(dates):
+        months = dates.astype('datetime64[M]')
+        return (months.astype(np.int64) // 12, months.astype(np.int64) % 12,
+                (dates - months.astype('datetime64[D]')).astype(np.int64) + 1)
+
+    y1, m1, d1 = parts(start)
+    y2, m2, d2 = parts(end)
+    d1 = np.minimum(d1, 30)
+    d2 = np.where(d1 == 30, np.minimum(d2, 30), d2)
+    return 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+
+
+def day_counts(start: np.ndarray, end: np.ndarray, convention="actual/365") -> list:
+    """Split each interval into (days, days per year) parts for a convention
+
+    Every convention gives one part except actual/actual, whose days in
+    common and in leap years are counted separately.
+    """
+    start = np.asarray(start, dtype='datetime64[D]')
+    end = np.asarray(end, dtype='datetime64[D]')
+    days = (end - start).astype(np.int64)
+
+    if convention == 'actual/365':
+        return [(days, 365)]
+    if convention == 'actual/360':
+        return [(days, 360)]
+    if convention == '30/360':
+        return [(_days_30_360(start, end), 360)]
+    if convention == 'actual/actual':
+        leap_days = _leap_days_before(end) - _leap_days_before(start)
+        return [(days - leap_days, 365), (leap_days, 366)]
+    raise ValueError(f"Unknown day-count convention: {convention}")
+
+
+def year_fraction(start: np.ndarray, end: np.ndarray, convention="actual/365") -> np.ndarray:
+    """Length of each interval in years under a day-count convention"""
+    return sum(days / basis for days, basis in day_counts(start, end, convention))
+
+
+def log_growth(rates: np.ndarray, start: np.ndarray, end: np.ndarray, convention="actual/365",
+               compounding="daily") -> np.ndarray:
+    """Natural log of the factor a balance grows by from start to end
+
+    rates are annual percentages. With daily compounding each day grows the
+    balance by rate / days-per-year; with simple interest the interval adds
+    rate * year fraction once. Logs are returned so growth over consecutive
+    intervals adds up.
+    """
+    rates = np.asarray(rates, dtype=np.float64) / 100
+    parts = day_counts(start, end, convention)
+    if compounding == 'daily':
+        return sum(days * np.log1p(rates / basis) for days, basis in parts)
+    if compounding == 'simple':
+        return np.log1p(rates * sum(days / basis for days, basis in parts))
+    raise ValueError(f"Unknown compounding: {compounding}")
+
+
+def _segmented_cumsum(values: np.ndarray, group_starts: np.ndarray) -> np.ndarray:
+    """Running sum that restarts at each group; group_starts is each element's group's first index"""
+    totals = np.cumsum(values)
+    return totals - (totals[group_starts] - values[group_starts])
+
+
+def accrue(principals, rates, start_dates, event_debts, event_dates, event_amounts, convention="actual/365",
+           compounding="daily") -> np.ndarray:
+    """Balance of a debt after each of its events, interest included
+
+    Debts are given as arrays of principal, annual rate (percent) and the
+    date interest starts; events as arrays of the debt's position in those
+    arrays, the date, and the amount paid (0 for a date that is only
+    observed). Each debt's balance starts at its principal, grows from one
+    payment to the next and drops by each payment; an observation reads
+    the balance grown from the last payment before it without becoming a
+    compounding point itself, so observing a date never changes simple
+    interest. A payment and an observation on the same day see the payment
+    first; events before a debt's start date are treated as happening on it.
+
+    Everything is whole-array arithmetic, with no loop over debts or dates:
+    with L the cumulative log growth of a debt up to a payment and a the
+    payments, the balance after payment k is exp(L_k) * (principal -
+    sum over j <= k of a_j * exp(-L_j)). Balances are returned in the
+    order the events were given.
+    """
+    principals = np.asarray(principals, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    start_dates = np.asarray(start_dates, dtype='datetime64[D]')
+    event_debts = np.asarray(event_debts, dtype=np.int64)
+    event_dates = np.maximum(np.asarray(event_dates, dtype='datetime64[D]'), start_dates[event_debts])
+    event_amounts = np.asarray(event_amounts, dtype=np.float64)
+    if len(event_debts) == 0:
+        return np.empty(0)
+
+    order = np.lexsort((event_amounts == 0, event_dates, event_debts))
+    debts = event_debts[order]
+    dates = event_dates[order]
+    amounts = event_amounts[order]
+    is_payment = amounts != 0
+
+    first = np.ones(len(debts), dtype=bool)
+    first[1:] = debts[1:] != debts[:-1]
+    positions = np.arange(len(debts))
+    group_starts = np.maximum.accumulate(np.where(first, positions, 0))
+
+    # Every event grows the balance from the last payment of its debt before it, or from the start date
+    last_payment = np.maximum.accumulate(np.where(is_payment, positions, -1))
+    previous_payment = np.concatenate(([-1], last_payment[:-1]))
+    anchored = previous_payment >= group_starts
+    anchors = np.where(anchored, dates[np.maximum(previous_payment, 0)], start_dates[debts])
+    since_payment = log_growth(rates[debts], anchors, dates, convention, compounding)
+
+    # Only payments compound; at an observation L stays at its last payment's value
+    growth = _segmented_cumsum(np.where(is_payment, since_payment, 0.0), group_starts)
+    paid = _segmented_cumsum(amounts * np.exp(-growth), group_starts)
+    balances = np.exp(growth) * (principals[debts] - paid)
+    balances = np.where(is_payment, balances, balances * np.exp(since_payment))
+
+    result = np.empty_like(balances)
+    result[order] = balances
+    return result
+
+
+def _positions(ids: np.ndarray, lookup) -> tuple:
+    """Index of each looked-up ID in the sorted ids array, and whether it is there at all"""
+    lookup = np.asarray(lookup, dtype=np.int64)
+    if len(ids) == 0:
+        return np.zeros(len(lookup), dtype=np.int64), np.zeros(len(lookup), dtype=bool)
+    positions = np.minimum(np.searchsorted(ids, lookup), len(ids) - 1)
+    return positions, ids[positions] == lookup
+
+
+def accrue_portfolio(debts: dict, payments: dict, observations: dict, convention="actual/365",
+                     compounding="daily") -> np.ndarray:
+    """Balances at observation dates for a whole portfolio
+
+    debts holds 'id', 'principal', 'interest_rate' and 'creation_date'
+    arrays sorted by id (get_all_debts_columnar() output), payments holds
+    'debt_id', 'amount' and 'payment_date' arrays and observations holds
+    'debt_id' and 'date' arrays. Payments after the last observation of
+    their debt don't affect any result. Observations of unknown debts are NaN.
+    """
+    start_time = time.time()
+    check_convention(convention, compounding)
+
+    ids = np.asarray(debts['id'], dtype=np.int64)
+    observed_positions, known = _positions(ids, observations['debt_id'])
+    payment_positions, paid = _positions(ids, payments['debt_id'])
+
+    event_debts = np.concatenate([payment_positions[paid], observed_positions[known]])
+    event_dates = np.concatenate([np.asarray(payments['payment_date'], dtype='datetime64[D]')[paid],
+                                  np.asarray(observations['date'], dtype='datetime64[D]')[known]])
+    event_amounts = np.concatenate([np.asarray(payments['amount'], dtype=np.float64)[paid],
+                                    np.zeros(int(known.sum()))])
+
+    balances = accrue(debts['principal'], debts['interest_rate'], debts['creation_date'], event_debts, event_dates,
+                      event_amounts, convention, compounding)
+
+    result = np.full(len(known), np.nan)
+    result[known] = balances[int(paid.sum()):]
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Accrued {len(ids)} debts over {int(paid.sum())} payments to {int(known.sum())} dates "
+          f"in {execution_time:.4f} seconds ({convention}, {compounding})")
+
+    return result
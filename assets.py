@@ -0,0 +1,234 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+from typing import Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    # gzip only; install the brotli package for smaller responses
+    brotli = None
+
+# Responses worth compressing; images and archives are compressed already
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml'
+}
+
+# Fingerprinted files never change under the same URL
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def accepts(encoding: str) -> bool:
+    """Whether the current request's Accept-Encoding allows an encoding"""
+    return request.accept_encodings[encoding] > 0
+
+
+def preferred_encoding() -> Optional[str]:
+    """Best content coding the client accepts: br when available, then gzip"""
+    if brotli is not None and accepts('br'):
+        return 'br'
+    if accepts('gzip'):
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str, level=6) -> bytes:
+    """Compress with a content coding; level is the gzip level, brotli uses one quality lower"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=max(level - 1, 0))
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ResponseCompressor:
+    """gzip/brotli compression of Flask responses above a size threshold
+
+    Only buffered responses with a compressible mimetype are compressed;
+    streamed responses (CSV exports), files sent with direct passthrough and
+    responses that already carry a Content-Encoding pass through unchanged.
+    """
+
+    def __init__(self, min_size=1024, level=6):
+        self.min_size = min_size
+        self.level = level
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCompressor"]:
+        """Compressor configured from DEBT_COMPRESS_* variables, or None when DEBT_COMPRESSION=0"""
+        if os.environ.get('DEBT_COMPRESSION', '1') == '0':
+            return None
+        return cls(
+            min_size=int(os.environ.get('DEBT_COMPRESS_MIN_SIZE', '1024')),
+            level=int(os.environ.get('DEBT_COMPRESS_LEVEL', '6'))
+        )
+
+    def init_app(self, app):
+        app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        if (response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = preferred_encoding()
+        data = response.get_data()
+        if encoding is None or len(data) < self.min_size:
+            return response
+
+        response.set_data(compress(data, encoding, self.level))
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # The compressed body is a different representation
+            response.set_etag(f"{response.get_etag()[0]}-{encoding}", weak=True)
+        return response
+
+
+def minify(text: str, extension: str) -> str:
+    """Whitespace and comment stripping that keeps every statement on its own line
+
+    Line breaks are kept so JavaScript's automatic semicolon insertion is
+    unaffected; indentation, blank lines and whole-line comments go. Lines
+    inside multi-line template literals are left exactly as they are.
+    """
+    if extension == '.html':
+        text = re.sub(r'<!--(?!\[if).*?-->', '', text, flags=re.S)
+    elif extension == '.css':
+        text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+
+    lines = []
+    in_template = False
+    for line in text.split('\n'):
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not (extension == '.js' and stripped.startswith('//')):
+                lines.append(stripped)
+        # An odd number of unescaped backticks opens or closes a template literal
+        if extension == '.js' and len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+
+    return '\n'.join(lines) + '\n'
+
+
+class AssetPipeline:
+    """Minified, content-hashed, precompressed static files
+
+    build() writes each source as ``name.<hash>.ext`` to ``output_dir``
+    together with .gz (and, with brotli installed, .br) copies and a
+    manifest.json, skipping files whose output already exists. References
+    to other assets in HTML sources are rewritten to their hashed URLs.
+    Hashed files are served under ``url_prefix`` with an immutable
+    Cache-Control, picking the precompressed variant the client accepts;
+    HTML entry points keep a stable URL and are revalidated by ETag.
+    page_globals are set on ``window`` by a script at the top of every HTML
+    page, ahead of the page's own scripts.
+    """
+
+    def __init__(self, sources, output_dir='static/dist', url_prefix='/assets', page_globals=None):
+        self.sources = dict(sources)
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix
+        self.page_globals = dict(page_globals or {})
+        self.manifest = {}
+        self._files = {}
+
+    @classmethod
+    def from_env(cls, sources, page_globals=None) -> "AssetPipeline":
+        return cls(sources, output_dir=os.environ.get('DEBT_ASSET_DIR', 'static/dist'), page_globals=page_globals)
+
+    def build(self) -> dict:
+        """Build every source and load the results; returns the manifest"""
+        start_time = time.time()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # HTML last, so the files it references already have their hashed names
+        names = sorted(self.sources, key=lambda name: name.endswith('.html'))
+        written = 0
+        for name in names:
+            with open(self.sources[name], encoding='utf-8') as f:
+                text = f.read()
+            base, extension = os.path.splitext(name)
+            text = minify(text, extension)
+            if extension == '.html':
+                for other, hashed in self.manifest.items():
+                    text = re.sub(rf'''(src|href)=(["']){re.escape(other)}\2''',
+                                  rf'\1=\2{self.url_prefix}/{hashed}\2', text)
+                if self.page_globals:
+                    script = ''.join(f"window.{key} = {json.dumps(value)};" for key, value in self.page_globals.items())
+                    text = re.sub(r'<head[^>]*>', lambda match: f"{match.group(0)}\n<script>{script}</script>", text,
+                                  count=1)
+            data = text.encode('utf-8')
+
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            hashed = f"{base}.{digest}{extension}"
+            self.manifest[name] = hashed
+
+            variants = {None: data, 'gzip': compress(data, 'gzip', 9)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+            suffixes = {None: '', 'gzip': '.gz', 'br': '.br'}
+            for encoding, content in variants.items():
+                path = os.path.join(self.output_dir, hashed + suffixes[encoding])
+                if not os.path.exists(path):
+                    temp_path = f"{path}.tmp"
+                    with open(temp_path, 'wb') as f:
+                        f.write(content)
+                    os.replace(temp_path, path)
+                    written += 1
+
+            self._files[hashed] = {
+                'variants': variants,
+                'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                'etag': digest
+            }
+
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+        print(f"Assets built in {execution_time:.4f} seconds ({len(self.manifest)} assets, {written} files written)")
+
+        return self.manifest
+
+    def url(self, name: str) -> str:
+        """Hashed URL of a source, for templates as asset_url('frontend.js')"""
+        return f"{self.url_prefix}/{self.manifest[name]}"
+
+    def init_app(self, app):
+        """Build the assets and serve them under url_prefix"""
+        self.build()
+        app.add_url_rule(f'{self.url_prefix}/<path:filename>', 'asset', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def serve(self, filename, cache_control=IMMUTABLE):
+        asset = self._files.get(filename)
+        if asset is None:
+            return Response('Not found', status=404, mimetype='text/plain')
+
+        encoding = preferred_encoding()
+        if encoding not in asset['variants']:
+            encoding = 'gzip' if encoding == 'br' and accepts('gzip') else None
+        etag = asset['etag'] if encoding is None else f"{asset['etag']}-{encoding}"
+
+        response = Response(asset['variants'][encoding], mimetype=asset['mimetype'])
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = cache_control
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def serve_page(self, name):
+        """Serve a built HTML entry point from its stable URL, revalidated by ETag"""
+        return self.serve(self.manifest[name], cache_control='no-cache')
@@ -0,0 +1,392 @@
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+import datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from debt_manager import DebtManager, Debt, Payment, to_cents
+
+
+def _quiet():
+    """Silence the per-operation timing prints from DebtManager"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _make_manager(directory, debt_count=10, **kwargs):
+    db_path = os.path.join(directory, "bench.db")
+    with _quiet():
+        manager = DebtManager(db_path, **kwargs)
+        for i in range(debt_count):
+            manager.add_debt(Debt(id=None, name=f"Debt {i}", principal=10000.0,
+                                  interest_rate=5.0 + i, min_payment=200.0))
+    return manager
+
+
+def bench_write_queue(payments=2000, threads=8, debt_count=10):
+    """Compare payments/sec for direct commits against the group-commit queue"""
+    results = {}
+
+    for label, use_queue in (("direct", False), ("write_queue", True)):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = _make_manager(directory, debt_count, use_write_queue=use_queue)
+            per_thread = payments // threads
+
+            def worker(offset):
+                for i in range(per_thread):
+                    payment = Payment(id=None, debt_id=(offset + i) % debt_count + 1,
+                                      amount=1.0, payment_date="2024-01-01")
+                    if use_queue:
+                        manager.add_payment_async(payment)
+                    else:
+                        manager.add_payment(payment)
+
+            with _quiet():
+                start_time = time.time()
+                workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+                for t in workers:
+                    t.start()
+                for t in workers:
+                    t.join()
+                if manager.write_queue is not None:
+                    manager.write_queue.flush()
+                elapsed = time.time() - start_time
+                manager.close()
+
+            results[label] = per_thread * threads / elapsed if elapsed > 0 else 0.0
+
+    for label, rate in results.items():
+        print(f"{label:<12} {rate:>12.1f} payments/sec")
+
+    return results
+
+
+def bench_cents_ledger(payments=1_000_000, debt_count=200):
+    """Compare float and integer-cents arithmetic for sums, plans and simulations"""
+    rng = np.random.default_rng(42)
+    amounts_cents = rng.integers(1, 100_000, size=payments, dtype=np.int64)
+    amounts = (amounts_cents / 100).tolist()
+
+    # Bulk sums: Python float accumulation vs an int64 array reduction
+    start_time = time.time()
+    float_total = 0.0
+    for amount in amounts:
+        float_total += amount
+    float_time = time.time() - start_time
+
+    start_time = time.time()
+    cents_total = int(amounts_cents.sum())
+    cents_time = time.time() - start_time
+
+    print(f"sum of {payments} payments: float {float_time:.4f}s, cents {cents_time:.4f}s")
+    print(f"  float drift: {abs(to_cents(float_total) - cents_total)} cents "
+          f"(raw error {float_total - cents_total / 100:.6f})")
+
+    # Plan and strategy engines against the same portfolio
+    for mode in ("float", "cents"):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "bench.db")
+            with _quiet():
+                manager = DebtManager(db_path, ledger_mode=mode)
+                for i in range(debt_count):
+                    manager.add_debt(Debt(id=None, name=f"Debt {i}", principal=1000.0 + 3.71 * i,
+                                          interest_rate=3.0 + (i % 20), min_payment=50.0 + i % 7))
+
+                start_time = time.time()
+                for debt_id in range(1, debt_count + 1):
+                    manager.generate_payment_plan(debt_id)
+                plan_time = time.time() - start_time
+
+                start_time = time.time()
+                results = manager.compare_payoff_strategies(100)
+                compare_time = time.time() - start_time
+
+            print(f"{mode:<6} plans {plan_time:.4f}s, strategies {compare_time:.4f}s, "
+                  f"avalanche interest ${results['avalanche']['interest_paid']:.2f}")
+
+
+def bench_debt_loading(debt_count=100_000):
+    """Time get_all_debts against get_all_debts_columnar on a large portfolio"""
+    with tempfile.TemporaryDirectory() as directory:
+        with _quiet():
+            manager = DebtManager(os.path.join(directory, "bench.db"))
+        conn = sqlite3.connect(manager.db_path)
+        conn.executemany('''
+        INSERT INTO debts (name, principal, interest_rate, min_payment, total_paid, creation_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f"Debt {i}", 1000.0 + i, 3.0 + i % 20, 50.0, 0.0, "2024-01-01") for i in range(debt_count)))
+        conn.commit()
+        conn.close()
+
+        with _quiet():
+            start_time = time.time()
+            debts = manager.get_all_debts()
+            objects_time = time.time() - start_time
+
+            start_time = time.time()
+            columns = manager.get_all_debts_columnar()
+            columnar_time = time.time() - start_time
+
+            start_time = time.time()
+            manager.get_all_debts_columnar(include_text=False)
+            numeric_time = time.time() - start_time
+
+        print(f"get_all_debts                   {objects_time:.4f}s ({len(debts)} Debt objects)")
+        print(f"get_all_debts_columnar          {columnar_time:.4f}s ({len(columns['id'])} rows)")
+        print(f"get_all_debts_columnar numeric  {numeric_time:.4f}s")
+
+
+def bench_streaming(sizes=(1_000, 1_000_000)):
+    """Peak Python memory while reading all payments eagerly vs through iter_payments"""
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            with _quiet():
+                manager = _make_manager(directory, debt_count=1)
+            conn = sqlite3.connect(manager.db_path)
+            conn.executemany(
+                'INSERT INTO payments (debt_id, amount, payment_date) VALUES (1, ?, ?)',
+                ((1.0 + i % 100, "2024-01-01") for i in range(size))
+            )
+            conn.commit()
+            conn.close()
+
+            with _quiet():
+                tracemalloc.start()
+                payments = manager.get_payments_for_debt(1)
+                eager_total = sum(payment.amount for payment in payments)
+                _, eager_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del payments
+
+                tracemalloc.start()
+                streamed_total = sum(payment.amount for payment in manager.iter_payments(debt_id=1))
+                _, streamed_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            assert eager_total == streamed_total
+            print(f"{size:>10} payments: eager peak {eager_peak / 1e6:8.2f} MB, "
+                  f"streamed peak {streamed_peak / 1e6:8.2f} MB")
+
+
+def bench_snapshot(debt_count=5_000):
+    """Startup cost of re-querying SQLite and replanning vs opening a snapshot"""
+    from snapshot import write_snapshot, load_snapshot
+
+    with tempfile.TemporaryDirectory() as directory:
+        with _quiet():
+            manager = DebtManager(os.path.join(directory, "bench.db"))
+        conn = sqlite3.connect(manager.db_path)
+        conn.executemany('''
+        INSERT INTO debts (name, principal, interest_rate, min_payment, total_paid, creation_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f"Debt {i}", 1000.0 + i, 3.0 + i % 20, 50.0, 0.0, "2024-01-01") for i in range(debt_count)))
+        conn.commit()
+        conn.close()
+
+        snapshot_path = os.path.join(directory, "portfolio.snap")
+        with _quiet():
+            start_time = time.time()
+            months = [len(manager.build_payment_plan(debt)) for debt in manager.get_all_debts()]
+            query_time = time.time() - start_time
+
+            write_snapshot(manager, snapshot_path)
+
+            start_time = time.time()
+            snapshot = load_snapshot(snapshot_path)
+            snapshot_months = snapshot.schedule_lengths("minimum")
+            snapshot_time = time.time() - start_time
+
+        assert months == snapshot_months.tolist()
+        print(f"query + replan {query_time:.4f}s, snapshot open + read {snapshot_time:.4f}s "
+              f"({os.path.getsize(snapshot_path) / 1e6:.1f} MB file)")
+        del snapshot_months
+        snapshot.close()
+
+
+def bench_stored_plan(payments=200, debt_count=20):
+    """Plan views after each payment: full regeneration of every plan vs the stored schedules"""
+    with tempfile.TemporaryDirectory() as directory:
+        with _quiet():
+            manager = DebtManager(os.path.join(directory, "bench.db"))
+            for i in range(debt_count):
+                manager.add_debt(Debt(id=None, name=f"Debt {i}", principal=20000.0 + i,
+                                      interest_rate=6.0 + i % 10, min_payment=150.0))
+            for debt in manager.get_all_debts():
+                manager.scheduled_payment_plan(debt)
+
+        today = datetime.date.today()
+        rng = np.random.default_rng(0)
+        full_time = stored_time = 0.0
+        for n in range(payments):
+            debt_id = int(rng.integers(1, debt_count + 1))
+            payment_date = today + relativedelta(months=int(rng.integers(-12, 240)))
+            with _quiet():
+                manager.add_payment(Payment(id=None, debt_id=debt_id, amount=float(rng.integers(10, 500)),
+                                            payment_date=payment_date.strftime("%Y-%m-%d")))
+                debts = manager.get_all_debts()
+
+                # A portfolio view shows every plan; only the paid debt changed
+                start_time = time.time()
+                manager._plan_cache.clear()
+                full = [manager.build_payment_plan(debt) for debt in debts]
+                full_time += time.time() - start_time
+
+                start_time = time.time()
+                manager._plan_cache.clear()
+                with manager.transaction():
+                    stored = [manager.scheduled_payment_plan(debt) for debt in debts]
+                stored_time += time.time() - start_time
+
+            for full_plan, stored_plan in zip(full, stored):
+                assert full_plan.equals(stored_plan)
+
+        print(f"{debt_count} plans per view: full regeneration {full_time / payments * 1000:.3f} ms/view, "
+              f"stored schedules {stored_time / payments * 1000:.3f} ms/view")
+
+
+def bench_optimizer(debt_count=1_000, horizon_months=360, seed=7):
+    """Time the allocation optimizer on a large portfolio and compare it with avalanche and snowball on the same engine"""
+    from optimizer import optimize_allocation
+
+    rng = np.random.default_rng(seed)
+    balances = np.round(rng.uniform(500, 25_000, debt_count), 2)
+    rates = np.round(rng.uniform(0, 30, debt_count), 2)
+    # Minimums cover the interest plus a sliver of principal, as card minimums do
+    min_payments = np.round(balances * (rates / 1200 + 0.0005), 2)
+    budget = float(min_payments.sum())
+
+    runs = 10
+    with _quiet():
+        optimize_allocation(balances, rates, min_payments, budget, max_months=horizon_months)
+        start_time = time.time()
+        for _ in range(runs):
+            optimized = optimize_allocation(balances, rates, min_payments, budget, max_months=horizon_months)
+        optimizer_time = (time.time() - start_time) / runs
+
+        # Worst case: a budget that never clears the debts runs the whole horizon
+        start_time = time.time()
+        for _ in range(runs):
+            optimize_allocation(balances, rates, min_payments, budget * 0.9, max_months=horizon_months, record=True)
+        full_horizon_time = (time.time() - start_time) / runs
+
+    # The fixed orderings on the same engine, so only the allocation order differs
+    with _quiet():
+        fixed = {}
+        for label, order in (("avalanche", np.argsort(-rates, kind='stable')),
+                             ("snowball", np.argsort(balances, kind='stable'))):
+            start_time = time.time()
+            run = optimize_allocation(balances, rates, min_payments, budget, max_months=horizon_months, order=order)
+            fixed[label] = (run['months'], run['interest'], time.time() - start_time)
+
+    print(f"{debt_count} debts, budget ${budget:,.2f}/month, horizon {horizon_months} months")
+    print(f"optimized  {optimized['months']:5d} months  ${optimized['interest']:>14,.2f} interest  "
+          f"{optimizer_time * 1000:8.2f} ms")
+    print(f"full {horizon_months}-month horizon with recorded allocations: {full_horizon_time * 1000:.2f} ms")
+    for label, (months, interest, elapsed) in fixed.items():
+        print(f"{label:10} {months:5d} months  ${interest:>14,.2f} interest  {elapsed * 1000:8.2f} ms  "
+              f"(optimized saves ${interest - optimized['interest']:,.2f}, {months - optimized['months']} months)")
+
+
+def bench_reports(debt_count=2_000, chart_count=100):
+    """Statement generation in this process vs fanned out over a process pool"""
+    from reports import generate_reports
+
+    with tempfile.TemporaryDirectory() as directory:
+        with _quiet():
+            manager = DebtManager(os.path.join(directory, "bench.db"))
+        conn = sqlite3.connect(manager.db_path)
+        conn.executemany('''
+        INSERT INTO debts (name, principal, interest_rate, min_payment, total_paid, creation_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f"Debt {i}", 1000.0 + i, 3.0 + i % 20, 50.0, 0.0, "2024-01-01") for i in range(debt_count)))
+        conn.executemany('INSERT INTO payments (debt_id, amount, payment_date) VALUES (?, ?, ?)',
+                         ((1 + i % debt_count, 25.0, f"2024-{1 + i % 12:02d}-01") for i in range(debt_count * 5)))
+        conn.commit()
+        conn.close()
+
+        workers = os.cpu_count() or 1
+        for label, charts, debt_ids in (("statements", False, None),
+                                        ("with charts", True, list(range(1, chart_count + 1)))):
+            for pool_size in sorted({1, workers}):
+                with _quiet():
+                    result = generate_reports(manager, os.path.join(directory, f"out-{label}-{pool_size}.zip"),
+                                              debt_ids, charts=charts, workers=pool_size)
+                print(f"{label:12} {result['debts']:6d} debts, {pool_size:2d} workers: {result['seconds']:.4f}s "
+                      f"({result['debts_per_second']:.1f} debts/s)")
+
+
+def bench_accrual(debt_count=100_000, payments_per_debt=10, sample=1_000):
+    """Daily-compounding reconciliation of a portfolio, SQL to result, vs a per-debt loop over the days"""
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as directory:
+        with _quiet():
+            manager = DebtManager(os.path.join(directory, "bench.db"))
+        conn = sqlite3.connect(manager.db_path)
+        conn.executemany('''
+        INSERT INTO debts (name, principal, interest_rate, min_payment, total_paid, creation_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f"Debt {i}", 1000.0 + i % 5000, 3.0 + i % 20, 50.0, 0.0, f"2020-{1 + i % 12:02d}-{1 + i % 28:02d}")
+              for i in range(debt_count)))
+        conn.executemany('INSERT INTO payments (debt_id, amount, payment_date) VALUES (?, ?, ?)',
+                         ((1 + i % debt_count, 25.0 + i % 7, f"{2021 + i % 4}-{1 + i % 12:02d}-{1 + i % 31 % 28:02d}")
+                          for i in range(debt_count * payments_per_debt)))
+        conn.commit()
+        conn.close()
+
+        statements = pd.DataFrame({'debt_id': np.arange(1, debt_count + 1),
+                                   'date': np.datetime64('2025-06-30'), 'balance': 0.0})
+        results = {}
+        for convention in ("actual/365", "actual/actual", "30/360"):
+            with _quiet():
+                start_time = time.time()
+                results[convention] = manager.reconcile_statements(statements, convention)
+                elapsed = time.time() - start_time
+            print(f"{convention:14} {debt_count} debts, {debt_count * payments_per_debt} payments: {elapsed:.4f}s")
+
+        # The same balances compounded one day at a time, debt by debt, as a loop would
+        with _quiet():
+            debts = manager.get_all_debts()[:sample]
+            start_time = time.time()
+            for debt in debts:
+                day = datetime.date.fromisoformat(debt.creation_date)
+                balance = debt.principal
+                payments = manager.get_payments_for_debt(debt.id)
+                for payment in payments + [Payment(None, debt.id, 0.0, '2025-06-30')]:
+                    while day < datetime.date.fromisoformat(payment.payment_date):
+                        balance *= 1 + debt.interest_rate / 100 / 365
+                        day += datetime.timedelta(days=1)
+                    balance -= payment.amount
+            loop_time = (time.time() - start_time) * debt_count / sample
+        error = abs(balance - results['actual/365']['expected_balance'].iloc[sample - 1])
+        print(f"per-debt loop, extrapolated from {sample} debts: {loop_time:.2f}s (last balance off by {error:.2e})")
+
+
+BENCHMARKS = {
+    'write_queue': bench_write_queue,
+    'cents_ledger': bench_cents_ledger,
+    'debt_loading': bench_debt_loading,
+    'streaming': bench_streaming,
+    'snapshot': bench_snapshot,
+    'stored_plan': bench_stored_plan,
+    'optimizer': bench_optimizer,
+    'reports': bench_reports,
+    'accrual': bench_accrual,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Debt Management System benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run ({', '.join(BENCHMARKS)})")
+    args = parser.parse_args()
+
+    for name in args.names or BENCHMARKS:
+        print(f"\n===== {name} =====")
+        BENCHMARKS[name]()
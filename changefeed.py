@@ -0,0 +1,306 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+def create_change_log(cursor, debt_columns):
+    """Change log table and the triggers that append to it on every committed write
+
+    debt_columns are the debt columns a client displays; updates that touch
+    only other columns (the cents mirrors kept by triggers) are not logged.
+    Each row is one change; seq orders them and is the SSE event ID.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        debt_id INTEGER NOT NULL,
+        payment_id INTEGER
+    )
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS changes_debt_insert AFTER INSERT ON debts BEGIN
+        INSERT INTO changes (kind, debt_id) VALUES ('debt_added', NEW.id);
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS changes_debt_update AFTER UPDATE OF {', '.join(debt_columns)} ON debts BEGIN
+        INSERT INTO changes (kind, debt_id) VALUES ('debt_updated', NEW.id);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS changes_debt_delete AFTER DELETE ON debts BEGIN
+        INSERT INTO changes (kind, debt_id) VALUES ('debt_deleted', OLD.id);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS changes_payment_insert AFTER INSERT ON payments BEGIN
+        INSERT INTO changes (kind, debt_id, payment_id) VALUES ('payment_added', NEW.debt_id, NEW.id);
+    END
+    ''')
+
+
+def sse_message(event: str, data, event_id=None) -> str:
+    """One server-sent event; data is sent as a single line of JSON"""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class _Subscriber:
+    def __init__(self, size):
+        self.queue = queue.Queue(size)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Pushes committed changes to any number of server-sent event clients
+
+    One broadcaster thread watches the database with PRAGMA data_version (a
+    counter SQLite bumps when another connection commits) on a connection
+    of its own, reads the new rows of the change log, and turns them into
+    one "changes" message that is queued, already formatted, for every
+    client. Changes are collapsed per debt and carry the current debt rows,
+    the new payments and the portfolio totals, so clients patch their view
+    in place. notify() wakes it early for writes made in this process.
+
+    A client reconnecting with Last-Event-ID is replayed from the log; a
+    new client, one whose ID predates the retained log, or one too slow to
+    keep up gets a full "snapshot" instead. The log is pruned to its last
+    ``retain`` changes whether or not anyone is subscribed, so start() the
+    feed with the application.
+
+    The callables read the application's own schema: debt_records(ids) and
+    payment_records(ids) map IDs to JSON-able dicts, totals() returns the
+    portfolio totals and snapshot() returns debts, payments and totals.
+    """
+
+    def __init__(self, connect, debt_records, payment_records, totals, snapshot, poll_interval=0.5,
+                 keepalive=15.0, queue_size=64, retain=10000, batch_size=1000):
+        self.connect = connect
+        self.debt_records = debt_records
+        self.payment_records = payment_records
+        self.totals = totals
+        self.snapshot = snapshot
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self.retain = retain
+        self.batch_size = batch_size
+
+        self.seq = 0
+        self._pruned_at = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def notify(self, *args):
+        """Check the change log now; usable as a DebtManager write listener"""
+        self._wake.set()
+
+    def _connect(self):
+        conn = self.connect()
+        conn.isolation_level = None
+        return conn
+
+    def _latest_seq(self, conn) -> int:
+        row = conn.execute('SELECT seq FROM changes ORDER BY seq DESC LIMIT 1').fetchone()
+        return row[0] if row else 0
+
+    def start(self):
+        with self._lock:
+            # A thread started before a fork does not run in the child
+            if self._thread is not None and self._thread.is_alive():
+                return
+            conn = self._connect()
+            try:
+                self.seq = self._latest_seq(conn)
+            finally:
+                conn.close()
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        conn = self._connect()
+        data_version = None
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+                try:
+                    version = conn.execute('PRAGMA data_version').fetchone()[0]
+                    if version == data_version:
+                        continue
+                    data_version = version
+
+                    with self._lock:
+                        listening = bool(self._subscribers)
+                    if listening:
+                        self._broadcast(conn)
+                    else:
+                        # Nobody to tell; skip ahead so the log is still pruned
+                        self.seq = self._latest_seq(conn)
+                    self._prune(conn)
+                except sqlite3.OperationalError as e:
+                    # Locked or briefly unavailable; the next poll retries
+                    data_version = None
+                    print(f"Change feed read failed: {e}")
+        finally:
+            conn.close()
+
+    def _broadcast(self, conn):
+        while True:
+            seq, changes = self.read_changes(conn, self.seq)
+            if seq == self.seq:
+                return
+            self.seq = seq
+            if changes:
+                message = sse_message('changes', {'seq': seq, 'changes': changes, 'totals': self.totals()}, seq)
+                with self._lock:
+                    subscribers = list(self._subscribers)
+                for subscriber in subscribers:
+                    try:
+                        subscriber.queue.put_nowait((seq, message))
+                    except queue.Full:
+                        subscriber.overflowed = True
+                print(f"Broadcast {len(changes)} changes up to {seq} to {len(subscribers)} clients")
+
+    def _prune(self, conn):
+        """Keep the last ``retain`` changes for clients reconnecting with Last-Event-ID"""
+        if self.seq - self._pruned_at >= self.retain:
+            conn.execute('DELETE FROM changes WHERE seq <= ?', (self.seq - self.retain,))
+            self._pruned_at = self.seq
+
+    def read_changes(self, conn, since: int) -> tuple:
+        """Changes after ``since``, collapsed per debt; returns (last seq, changes)
+
+        Debts are described as they are now, so a debt added and updated
+        in the same batch is one debt_added with its latest state, and one
+        deleted later in the batch is only reported as deleted.
+        """
+        rows = conn.execute('SELECT seq, kind, debt_id, payment_id FROM changes WHERE seq > ? ORDER BY seq LIMIT ?',
+                            (since, self.batch_size)).fetchall()
+        if not rows:
+            return since, []
+
+        last_kind = {}
+        for seq, kind, debt_id, payment_id in rows:
+            if kind != 'payment_added':
+                # An update never hides an add or delete that comes before it in the batch
+                previous = last_kind.get(debt_id)
+                if not (kind == 'debt_updated' and previous in ('debt_added', 'debt_deleted')):
+                    last_kind[debt_id] = kind
+
+        debts = self.debt_records([debt_id for debt_id, kind in last_kind.items() if kind != 'debt_deleted'])
+        payments = self.payment_records([payment_id for _, kind, _, payment_id in rows if kind == 'payment_added'])
+
+        changes = []
+        reported = set()
+        for seq, kind, debt_id, payment_id in rows:
+            if kind == 'payment_added':
+                if payment_id in payments:
+                    changes.append({'seq': seq, 'kind': kind, 'payment': payments[payment_id]})
+                continue
+            if debt_id in reported:
+                continue
+            reported.add(debt_id)
+            kind = last_kind[debt_id]
+            if kind != 'debt_deleted' and debt_id not in debts:
+                # Gone by the time it was read; its delete is further down the log
+                continue
+            if kind == 'debt_deleted':
+                changes.append({'seq': seq, 'kind': kind, 'debt_id': debt_id})
+            else:
+                changes.append({'seq': seq, 'kind': kind, 'debt': debts[debt_id]})
+
+        return rows[-1][0], changes
+
+    def subscribe(self) -> _Subscriber:
+        self.start()
+        subscriber = _Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _snapshot_message(self, conn) -> tuple:
+        # Read the position first: changes racing the snapshot are replayed, which is harmless
+        seq = self._latest_seq(conn)
+        return seq, sse_message('snapshot', {'seq': seq, **self.snapshot()}, seq)
+
+    def _replay(self, conn, since: int):
+        """Messages bringing a client from ``since`` up to date, or None if the log no longer reaches back"""
+        oldest = conn.execute('SELECT MIN(seq) FROM changes').fetchone()[0]
+        if since < self._latest_seq(conn) and (oldest is None or since < oldest - 1):
+            return None
+        messages = []
+        while True:
+            seq, changes = self.read_changes(conn, since)
+            if seq == since:
+                return since, messages
+            if changes:
+                messages.append(sse_message('changes', {'seq': seq, 'changes': changes, 'totals': self.totals()}, seq))
+            since = seq
+
+    def stream(self, last_event_id: Optional[str] = None):
+        """Generator of SSE text for one client, ending when the client disconnects"""
+        start_time = time.time()
+        subscriber = self.subscribe()
+        conn = self._connect()
+        try:
+            yield f"retry: {int(self.poll_interval * 4000)}\n\n"
+
+            replay = None
+            if last_event_id is not None and last_event_id.isdigit():
+                replay = self._replay(conn, int(last_event_id))
+            if replay is None:
+                sent, message = self._snapshot_message(conn)
+                yield message
+            else:
+                sent, messages = replay
+                yield from messages
+            conn.close()
+            conn = None
+
+            while True:
+                if subscriber.overflowed:
+                    # Dropped messages can't be patched in; start the client over
+                    subscriber.overflowed = False
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    conn = self._connect()
+                    sent, message = self._snapshot_message(conn)
+                    conn.close()
+                    conn = None
+                    yield message
+                    continue
+                try:
+                    seq, message = subscriber.queue.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if seq > sent:
+                    sent = seq
+                    yield message
+        finally:
+            if conn is not None:
+                conn.close()
+            self.unsubscribe(subscriber)
+            end_time = time.time()
+            execution_time = end_time - start_time
+            print(f"Change feed client disconnected after {execution_time:.4f} seconds")
@@ -6,6 +6,21 @@ let strategyResults = null;
 let paymentPlanChart = null;
 let distributionChart = null;
 let strategyChart = null;
+let changeSource = null;
+
+// Base URL of the web.py server ('' when web.py serves this page itself). When
+// set, chart series are fetched from its /api/series endpoints and debts and
+// payments follow its /api/changes stream; otherwise they are simulated
+// locally from the demo data.
+const API_BASE = window.DEBT_API_BASE ?? null;
+
+// Fetch a pre-aggregated chart series from the server
+function fetchSeries(path) {
+    return fetch(`${API_BASE}/api/series/${path}`).then(response => {
+        if (!response.ok) throw new Error(`Series request failed: ${response.status}`);
+        return response.json();
+    });
+}
 
 // Load mock data for demo
 function loadMockData() {
@@ -97,6 +112,10 @@ function init() {
     });
     
     loadMockData();
+    
+    if (API_BASE !== null) {
+        subscribeChanges();
+    }
 }
 
 // Show the selected page
@@ -141,17 +160,21 @@ function closeModal(modalId) {
 
 // Update dashboard with latest data
 function updateDashboard() {
-    const totalDebt = debts.reduce((sum, debt) => sum + debt.current_balance, 0);
+    updateTotals();
+    updateDebtsTable();
+    updatePaymentsTable();
+}
+
+// Update the summary cards; totals pushed by the server take precedence over local sums
+function updateTotals(totals = null) {
+    const totalDebt = totals ? totals.total_balance : debts.reduce((sum, debt) => sum + debt.current_balance, 0);
     const totalInterest = debts.reduce((sum, debt) => sum + debt.monthly_interest, 0);
-    const totalMinPayment = debts.reduce((sum, debt) => sum + debt.min_payment, 0);
+    const totalMinPayment = totals ? totals.total_min_payment : debts.reduce((sum, debt) => sum + debt.min_payment, 0);
     
     document.getElementById('total-debt').textContent = `$${totalDebt.toFixed(2)}`;
     document.getElementById('monthly-interest').textContent = `$${totalInterest.toFixed(2)}`;
     document.getElementById('monthly-payment').textContent = `$${totalMinPayment.toFixed(2)}`;
-    document.getElementById('debt-count').textContent = debts.length;
-    
-    updateDebtsTable();
-    updatePaymentsTable();
+    document.getElementById('debt-count').textContent = totals ? totals.debt_count : debts.length;
 }
 
 // Update the debts table
@@ -161,25 +184,99 @@ function updateDebtsTable() {
     
     debts.forEach(debt => {
         const row = document.createElement('tr');
-        
-        const payoffTime = calculatePayoffTime(debt);
-        
-        row.innerHTML = `
-            <td>${debt.name}</td>
-            <td>$${debt.current_balance.toFixed(2)}</td>
-            <td>${debt.interest_rate}%</td>
-            <td>$${debt.min_payment.toFixed(2)}</td>
-            <td>${payoffTime}</td>
-            <td class="action-column">
-                <button class="btn btn-success btn-sm" onclick="viewDebtDetails(${debt.id})">Details</button>
-                <button class="btn btn-danger btn-sm" onclick="confirmDeleteDebt(${debt.id}, '${debt.name}')">Delete</button>
-            </td>
-        `;
-        
+        renderDebtRow(row, debt);
         tableBody.appendChild(row);
     });
 }
 
+// Fill one debts table row
+function renderDebtRow(row, debt) {
+    const payoffTime = calculatePayoffTime(debt);
+    
+    row.dataset.debtId = debt.id;
+    row.innerHTML = `
+        <td>${debt.name}</td>
+        <td>$${debt.current_balance.toFixed(2)}</td>
+        <td>${debt.interest_rate}%</td>
+        <td>$${debt.min_payment.toFixed(2)}</td>
+        <td>${payoffTime}</td>
+        <td class="action-column">
+            <button class="btn btn-success btn-sm" onclick="viewDebtDetails(${debt.id})">Details</button>
+            <button class="btn btn-danger btn-sm" onclick="confirmDeleteDebt(${debt.id}, '${debt.name}')">Delete</button>
+        </td>
+    `;
+}
+
+// Re-render the row of a changed debt, or append one for a new debt
+function patchDebtRow(debt) {
+    const tableBody = document.getElementById('debts-table-body');
+    let row = tableBody.querySelector(`tr[data-debt-id="${debt.id}"]`);
+    if (!row) {
+        row = document.createElement('tr');
+        tableBody.appendChild(row);
+    }
+    renderDebtRow(row, debt);
+}
+
+function removeDebtRow(debtId) {
+    const row = document.querySelector(`#debts-table-body tr[data-debt-id="${debtId}"]`);
+    if (row) row.remove();
+}
+
+// Live updates from the server's /api/changes event stream. A "snapshot"
+// replaces the local state; "changes" carry only the debts and payments that
+// changed since the last event, which are patched in place. EventSource
+// reconnects by itself and resumes from the last event ID it received.
+function subscribeChanges() {
+    if (changeSource) changeSource.close();
+    changeSource = new EventSource(`${API_BASE}/api/changes`);
+    
+    changeSource.addEventListener('snapshot', event => {
+        const snapshot = JSON.parse(event.data);
+        debts = snapshot.debts;
+        payments = snapshot.payments;
+        updateTotals(snapshot.totals);
+        updateDebtsTable();
+        updatePaymentsTable();
+    });
+    
+    changeSource.addEventListener('changes', event => {
+        applyChanges(JSON.parse(event.data));
+    });
+}
+
+// Apply one batch of changes pushed by the server
+function applyChanges(batch) {
+    let paymentsChanged = false;
+    
+    batch.changes.forEach(change => {
+        if (change.kind === 'payment_added') {
+            if (!payments.some(p => p.id === change.payment.id)) {
+                payments.push(change.payment);
+                paymentsChanged = true;
+            }
+        } else if (change.kind === 'debt_deleted') {
+            debts = debts.filter(d => d.id !== change.debt_id);
+            payments = payments.filter(p => p.debt_id !== change.debt_id);
+            removeDebtRow(change.debt_id);
+            paymentsChanged = true;
+        } else {
+            const index = debts.findIndex(d => d.id === change.debt.id);
+            if (index === -1) {
+                debts.push(change.debt);
+            } else {
+                debts[index] = change.debt;
+            }
+            patchDebtRow(change.debt);
+        }
+    });
+    
+    updateTotals(batch.totals);
+    if (paymentsChanged) {
+        updatePaymentsTable();
+    }
+}
+
 // Update the payments table
 function updatePaymentsTable() {
     const tableBody = document.getElementById('payments-table-body');
@@ -498,36 +595,30 @@ function generatePaymentPlan(debtId) {
     
     // Check if we've already calculated this plan
     const planKey = `${debtId}-${strategy}`;
-    let plan = paymentPlans[planKey];
-    
-    if (!plan) {
+    const series = paymentPlans[planKey];
+    
+    if (series) {
+        renderPaymentPlan(series, strategy);
+    } else if (API_BASE !== null) {
+        // Server-computed, downsampled series; fall back to the local simulation
+        fetchSeries(`debt/${debtId}/plan?strategy=${encodeURIComponent(strategy)}`)
+            .then(series => {
+                paymentPlans[planKey] = series;
+                renderPaymentPlan(series, strategy);
+            })
+            .catch(() => {
+                paymentPlans[planKey] = planToSeries(simulatePaymentPlan(debt, strategy));
+                renderPaymentPlan(paymentPlans[planKey], strategy);
+            });
+    } else {
         // Generate the plan (simplified simulation)
-        plan = simulatePaymentPlan(debt, strategy);
-        paymentPlans[planKey] = plan;
+        paymentPlans[planKey] = planToSeries(simulatePaymentPlan(debt, strategy));
+        renderPaymentPlan(paymentPlans[planKey], strategy);
     }
-    
-    // Update the summary
-    const totalInterest = plan.interest.reduce((sum, val) => sum + val, 0);
-    const totalPayments = plan.payment.reduce((sum, val) => sum + val, 0);
-    
-    document.getElementById('payment-plan-summary').innerHTML = `
-        <div class="dashboard-card">
-            <h3>Payment Plan Summary (${strategy === 'minimum' ? 'Minimum Payments' : 'Accelerated Payments'})</h3>
-            <p>Months to pay off: <strong>${plan.month.length}</strong></p>
-            <p>Total interest paid: <strong>$${totalInterest.toFixed(2)}</strong></p>
-            <p>Total amount paid: <strong>$${totalPayments.toFixed(2)}</strong></p>
-        </div>
-    `;
-    
-    // Create or update the chart
-    createPaymentPlanChart(plan);
 }
 
-// Create payment plan chart
-function createPaymentPlanChart(plan) {
-    const ctx = document.getElementById('payment-plan-chart').getContext('2d');
-    
-    // Calculate cumulative interest and payments
+// Convert a simulated plan to the series shape served by /api/series, in one pass
+function planToSeries(plan) {
     const cumulativeInterest = [];
     const cumulativePayments = [];
     let interestSum = 0;
@@ -540,17 +631,47 @@ function createPaymentPlanChart(plan) {
         cumulativePayments.push(paymentSum);
     }
     
+    return {
+        month: plan.month,
+        balance: plan.balance,
+        cumulative_payment: cumulativePayments,
+        cumulative_interest: cumulativeInterest,
+        months: plan.month.length,
+        total_payment: paymentSum,
+        total_interest: interestSum
+    };
+}
+
+// Update the plan summary and chart from a plan series
+function renderPaymentPlan(series, strategy) {
+    document.getElementById('payment-plan-summary').innerHTML = `
+        <div class="dashboard-card">
+            <h3>Payment Plan Summary (${strategy === 'minimum' ? 'Minimum Payments' : 'Accelerated Payments'})</h3>
+            <p>Months to pay off: <strong>${series.months}</strong></p>
+            <p>Total interest paid: <strong>$${series.total_interest.toFixed(2)}</strong></p>
+            <p>Total amount paid: <strong>$${series.total_payment.toFixed(2)}</strong></p>
+        </div>
+    `;
+    
+    // Create or update the chart
+    createPaymentPlanChart(series);
+}
+
+// Create payment plan chart
+function createPaymentPlanChart(series) {
+    const ctx = document.getElementById('payment-plan-chart').getContext('2d');
+    
     // Destroy existing chart if it exists
     if (paymentPlanChart) paymentPlanChart.destroy();
     
     paymentPlanChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: plan.month,
+            labels: series.month,
             datasets: [
                 {
                     label: 'Balance',
-                    data: plan.balance,
+                    data: series.balance,
                     borderColor: '#dc2626',
                     backgroundColor: 'rgba(220, 38, 38, 0.1)',
                     fill: true,
@@ -558,7 +679,7 @@ function createPaymentPlanChart(plan) {
                 },
                 {
                     label: 'Payments Made',
-                    data: cumulativePayments,
+                    data: series.cumulative_payment,
                     borderColor: '#16a34a',
                     backgroundColor: 'rgba(22, 163, 74, 0.1)',
                     fill: true,
@@ -566,7 +687,7 @@ function createPaymentPlanChart(plan) {
                 },
                 {
                     label: 'Interest Paid',
-                    data: cumulativeInterest,
+                    data: series.cumulative_interest,
                     borderColor: '#ea580c',
                     backgroundColor: 'rgba(234, 88, 12, 0.1)',
                     fill: true,
@@ -1,19 +1,49 @@
 import os
+import re
 import sqlite3
-from flask import Flask, render_template, request, redirect, url_for, flash
+import time
+import uuid
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response
+from profiling import RequestProfiler, RequestSQLTracer
+from assets import ResponseCompressor
+from changefeed import ChangeFeed, create_change_log
+import sqltrace
+from write_retry import BUSY_TIMEOUT, write_with_retry
+from migrations import apply_migrations
 from datetime import datetime
 
 # Create Flask app
 app = Flask(__name__)
 app.secret_key = 'dev_key_change_in_production'
 
+# Opt-in request profiling (DEBT_PROFILING=1), see profiling.RequestProfiler
+profiler = RequestProfiler.from_env()
+if profiler is not None:
+    profiler.init_app(app)
+
+# Opt-in SQL tracing (DEBT_SQL_TRACE=1), see profiling.RequestSQLTracer
+sql_tracer = RequestSQLTracer.from_env()
+if sql_tracer is not None:
+    sql_tracer.init_app(app)
+
+# gzip/brotli compression of larger responses (DEBT_COMPRESSION=0 turns it off)
+compressor = ResponseCompressor.from_env()
+if compressor is not None:
+    compressor.init_app(app)
+
 # Database setup
 DB_PATH = 'debt_tracker.db'
 
+def connect_db(timeout=5.0):
+    """Open the tracker database; statements are traced while a request trace is active"""
+    return sqltrace.connect(DB_PATH, timeout=timeout)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+    """Bring the tracker schema up to date; a current database costs one PRAGMA read"""
+    apply_migrations(lambda: connect_db(BUSY_TIMEOUT), TRACKER_MIGRATIONS, DB_PATH)
+
+def create_tables(cursor):
+    """Create the debts and payments tables"""
     # Create debts table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS debts (
@@ -37,17 +67,160 @@ def init_db():
         FOREIGN KEY (debt_id) REFERENCES debts (id)
     )
     ''')
+
+def add_idempotency_keys(cursor):
+    """A retried payment is found by its idempotency key instead of being applied twice"""
+    payment_columns = {row[1] for row in cursor.execute('PRAGMA table_info(payments)')}
+    if 'idempotency_key' not in payment_columns:
+        cursor.execute('ALTER TABLE payments ADD COLUMN idempotency_key TEXT')
+    cursor.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_idempotency_key
+    ON payments (idempotency_key) WHERE idempotency_key IS NOT NULL
+    ''')
+
+def init_search_index(cursor):
+    """Create the range filter indexes and, where SQLite has FTS5, the name index with its sync triggers"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_debts_balance ON debts ((amount - paid))')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_debts_interest_rate ON debts (interest_rate)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_debts_created_at ON debts (created_at)')
     
-    conn.commit()
-    conn.close()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'debts_fts'")
+    fts_exists = cursor.fetchone() is not None
+    
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS debts_fts USING fts5(
+            name, content='debts', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS debts_fts_insert AFTER INSERT ON debts BEGIN
+            INSERT INTO debts_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS debts_fts_delete AFTER DELETE ON debts BEGIN
+            INSERT INTO debts_fts (debts_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS debts_fts_update AFTER UPDATE OF name ON debts BEGIN
+            INSERT INTO debts_fts (debts_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+            INSERT INTO debts_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+        ''')
+        
+        if not fts_exists:
+            # Index the debts that predate the FTS table
+            cursor.execute("INSERT INTO debts_fts (debts_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; search_debts falls back to LIKE
+        pass
+
+def init_change_log(cursor):
+    """Change log behind /api/changes"""
+    create_change_log(cursor, ('name', 'amount', 'interest_rate', 'min_payment', 'paid'))
+
+# Versioned tracker schema: (user_version, description, migrate(cursor)); append only
+TRACKER_MIGRATIONS = [
+    (1, "debts and payments tables", create_tables),
+    (2, "payment idempotency keys", add_idempotency_keys),
+    (3, "search indexes", init_search_index),
+    (4, "change log", init_change_log)
+]
+
+# Search filters: query-string name -> (SQL condition, parser)
+SEARCH_FILTERS = {
+    'min_balance': ('(amount - paid) >= ?', float),
+    'max_balance': ('(amount - paid) <= ?', float),
+    'min_rate': ('interest_rate >= ?', float),
+    'max_rate': ('interest_rate <= ?', float),
+    'created_after': ('created_at >= ?', str),
+    'created_before': ('created_at <= ?', str)
+}
+
+def page_bounds(args):
+    """Search page size (1 to 500, default 50) and offset (0 or more) from request args"""
+    # SQLite reads a negative LIMIT as no limit at all
+    limit = max(1, min(int(args.get('limit') or 50), 500))
+    offset = max(0, int(args.get('offset') or 0))
+    return limit, offset
+
+def search_debts(cursor, args):
+    """Run a debt search from request args; raises ValueError on bad filters
+    
+    Each word of ``q`` matches a name prefix through the FTS5 index (best
+    matches first), or anywhere in the name with LIKE when SQLite has no
+    FTS5; the range filters use the balance, rate and date indexes. Returns
+    one page of ``limit`` rows from ``offset`` and whether more follow.
+    """
+    conditions = []
+    params = []
+    
+    for name, (condition, parse) in SEARCH_FILTERS.items():
+        if args.get(name):
+            conditions.append(condition)
+            params.append(parse(args[name]))
+    
+    if args.get('paid_off'):
+        paid_off = args['paid_off'].lower() in ('1', 'true', 'yes')
+        conditions.append('(amount - paid) <= 0' if paid_off else '(amount - paid) > 0')
+    
+    limit, offset = page_bounds(args)
+    
+    words = re.findall(r'\w+', args.get('q', ''))
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'debts_fts'")
+    if words and cursor.fetchone() is not None:
+        query = '''
+        SELECT debts.* FROM (SELECT rowid AS match_id, rank AS match_rank FROM debts_fts WHERE debts_fts MATCH ?) AS matches
+        JOIN debts ON debts.id = matches.match_id
+        '''
+        params.insert(0, ' '.join(f'"{word}"*' for word in words))
+        order = 'matches.match_rank, debts.id'
+    else:
+        query = 'SELECT * FROM debts'
+        for word in words:
+            conditions.append('name LIKE ?')
+            params.append(f'%{word}%')
+        order = 'id'
+    
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {order} LIMIT ? OFFSET ?'
+    
+    # One row past the page tells whether another page follows
+    cursor.execute(query, params + [limit + 1, offset])
+    rows = cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+def search_pages(args, count, more):
+    """Previous and next page links for a search results page"""
+    limit, offset = page_bounds(args)
+    pages = {'previous_page': None, 'next_page': None}
+    if offset > 0:
+        pages['previous_page'] = url_for('all_debts', **dict(args.to_dict(), offset=max(offset - limit, 0)))
+    if more:
+        pages['next_page'] = url_for('all_debts', **dict(args.to_dict(), offset=offset + count))
+    return pages
 
-# Create a simple template directory and index.html
+def write_template(name, content):
+    """Write a template file unless it already has this content"""
+    path = os.path.join('templates', name)
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w') as f:
+        f.write(content)
+    return True
+
+# Create a simple template directory and index.html; files that are already
+# up to date are left alone, so restarts don't rewrite them
 def create_templates():
     if not os.path.exists('templates'):
         os.makedirs('templates')
     
-    with open('templates/layout.html', 'w') as f:
-        f.write('''<!DOCTYPE html>
+    write_template('layout.html', '''<!DOCTYPE html>
 <html>
 <head>
     <title>Debt Manager</title>
@@ -179,8 +352,7 @@ def create_templates():
 </body>
 </html>''')
     
-    with open('templates/index.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('index.html', '''{% extends "layout.html" %}
 {% block content %}
     <h1>Debt Management Dashboard</h1>
     
@@ -232,14 +404,29 @@ def create_templates():
     {% endif %}
 {% endblock %}''')
     
-    with open('templates/debts.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('debts.html', '''{% extends "layout.html" %}
 {% block content %}
     <div style="display: flex; justify-content: space-between; align-items: center;">
         <h1>Your Debts</h1>
         <a href="/debt/add" class="btn">Add Debt</a>
     </div>
     
+    <form method="get" action="/debts" class="card" style="display: flex; gap: 10px; flex-wrap: wrap; align-items: flex-end;">
+        <input type="text" name="q" placeholder="Search by name" value="{{ search.get('q', '') if search else '' }}">
+        <input type="number" step="0.01" name="min_balance" placeholder="Min balance" value="{{ search.get('min_balance', '') if search else '' }}">
+        <input type="number" step="0.01" name="max_balance" placeholder="Max balance" value="{{ search.get('max_balance', '') if search else '' }}">
+        <input type="number" step="0.01" name="min_rate" placeholder="Min rate %" value="{{ search.get('min_rate', '') if search else '' }}">
+        <input type="number" step="0.01" name="max_rate" placeholder="Max rate %" value="{{ search.get('max_rate', '') if search else '' }}">
+        <input type="date" name="created_after" value="{{ search.get('created_after', '') if search else '' }}">
+        <input type="date" name="created_before" value="{{ search.get('created_before', '') if search else '' }}">
+        <select name="paid_off">
+            <option value="">Any status</option>
+            <option value="0" {% if search and search.get('paid_off') == '0' %}selected{% endif %}>Outstanding</option>
+            <option value="1" {% if search and search.get('paid_off') == '1' %}selected{% endif %}>Paid off</option>
+        </select>
+        <button type="submit" class="btn">Search</button>
+    </form>
+    
     {% if debts %}
         <table>
             <thead>
@@ -267,6 +454,12 @@ def create_templates():
                 {% endfor %}
             </tbody>
         </table>
+        {% if previous_page or next_page %}
+            <div style="display: flex; gap: 10px;">
+                {% if previous_page %}<a href="{{ previous_page }}" class="btn">Previous</a>{% endif %}
+                {% if next_page %}<a href="{{ next_page }}" class="btn">Next</a>{% endif %}
+            </div>
+        {% endif %}
     {% else %}
         <div class="card">
             <h2>No debts found</h2>
@@ -276,8 +469,7 @@ def create_templates():
     {% endif %}
 {% endblock %}''')
     
-    with open('templates/add_debt.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('add_debt.html', '''{% extends "layout.html" %}
 {% block content %}
     <h1>Add New Debt</h1>
     
@@ -309,8 +501,7 @@ def create_templates():
     </div>
 {% endblock %}''')
     
-    with open('templates/view_debt.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('view_debt.html', '''{% extends "layout.html" %}
 {% block content %}
     <div style="display: flex; justify-content: space-between; align-items: center;">
         <h1>{{ debt['name'] }}</h1>
@@ -367,8 +558,7 @@ def create_templates():
     {% endif %}
 {% endblock %}''')
     
-    with open('templates/edit_debt.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('edit_debt.html', '''{% extends "layout.html" %}
 {% block content %}
     <h1>Edit Debt</h1>
     
@@ -400,8 +590,7 @@ def create_templates():
     </div>
 {% endblock %}''')
     
-    with open('templates/add_payment.html', 'w') as f:
-        f.write('''{% extends "layout.html" %}
+    write_template('add_payment.html', '''{% extends "layout.html" %}
 {% block content %}
     <h1>Make Payment</h1>
     <h2>{{ debt['name'] }}</h2>
@@ -424,6 +613,8 @@ def create_templates():
                 <input type="date" id="date" name="date" value="{{ today }}" required>
             </div>
             
+            <input type="hidden" name="idempotency_key" value="{{ idempotency_key }}">
+            
             <button type="submit" class="btn btn-success">Add Payment</button>
             <a href="/debt/{{ debt['id'] }}" style="margin-left: 10px;">Cancel</a>
         </form>
@@ -433,7 +624,7 @@ def create_templates():
 # Routes
 @app.route('/')
 def index():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -470,12 +661,23 @@ def index():
 
 @app.route('/debts')
 def all_debts():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM debts')
-    db_debts = cursor.fetchall()
+    searching = any(request.args.get(name) for name in ('q', 'paid_off', *SEARCH_FILTERS))
+    pages = {}
+    if searching:
+        try:
+            db_debts, more = search_debts(cursor, request.args)
+            pages = search_pages(request.args, len(db_debts), more)
+        except ValueError:
+            conn.close()
+            flash('Invalid search filter', 'danger')
+            return redirect(url_for('all_debts'))
+    else:
+        cursor.execute('SELECT * FROM debts')
+        db_debts = cursor.fetchall()
     
     debts = []
     
@@ -492,7 +694,39 @@ def all_debts():
     
     conn.close()
     
-    return render_template('debts.html', debts=debts)
+    return render_template('debts.html', debts=debts, search=request.args if searching else None, **pages)
+
+@app.route('/api/debts/search')
+def api_search_debts():
+    start_time = time.time()
+    
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    try:
+        db_debts, more = search_debts(cursor, request.args)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': f'Invalid search filter: {e}'}), 400
+    
+    conn.close()
+    
+    debts = [{
+        'id': debt['id'],
+        'name': debt['name'],
+        'balance': round(debt['amount'] - debt['paid'], 2),
+        'interest_rate': debt['interest_rate'],
+        'min_payment': debt['min_payment'],
+        'created_at': debt['created_at']
+    } for debt in db_debts]
+    
+    return jsonify({
+        'debts': debts,
+        'count': len(debts),
+        'next_offset': page_bounds(request.args)[1] + len(debts) if more else None,
+        'elapsed_ms': round((time.time() - start_time) * 1000, 2)
+    })
 
 @app.route('/debt/add', methods=['GET', 'POST'])
 def add_debt():
@@ -503,7 +737,7 @@ def add_debt():
         min_payment = float(request.form['min_payment'])
         created_at = datetime.now().strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -521,7 +755,7 @@ def add_debt():
 
 @app.route('/debt/<int:debt_id>')
 def view_debt(debt_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -564,7 +798,7 @@ def view_debt(debt_id):
 
 @app.route('/debt/<int:debt_id>/edit', methods=['GET', 'POST'])
 def edit_debt(debt_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -610,7 +844,7 @@ def edit_debt(debt_id):
 
 @app.route('/debt/<int:debt_id>/delete', methods=['POST'])
 def delete_debt(debt_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     cursor = conn.cursor()
     
     cursor.execute('SELECT name FROM debts WHERE id = ?', (debt_id,))
@@ -634,7 +868,7 @@ def delete_debt(debt_id):
 
 @app.route('/debt/<int:debt_id>/payment', methods=['GET', 'POST'])
 def add_payment(debt_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -648,24 +882,42 @@ def add_payment(debt_id):
     if request.method == 'POST':
         amount = float(request.form['amount'])
         date = request.form['date']
-        
-        # Add the payment
-        cursor.execute('''
-        INSERT INTO payments (debt_id, amount, date)
-        VALUES (?, ?, ?)
-        ''', (debt_id, amount, date))
-        
-        # Update the total paid amount
-        cursor.execute('''
-        UPDATE debts
-        SET paid = paid + ?
-        WHERE id = ?
-        ''', (amount, debt_id))
-        
-        conn.commit()
+        key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key') or None
         conn.close()
         
-        flash(f'Payment of ${amount:.2f} added successfully!', 'success')
+        def write(cursor):
+            if key is not None:
+                cursor.execute('SELECT debt_id, amount FROM payments WHERE idempotency_key = ?', (key,))
+                existing = cursor.fetchone()
+                if existing:
+                    if existing[0] != debt_id or round(existing[1], 2) != round(amount, 2):
+                        raise ValueError(f'Idempotency key {key} was already used for a different payment')
+                    return False
+            
+            # Add the payment
+            cursor.execute('''
+            INSERT INTO payments (debt_id, amount, date, idempotency_key)
+            VALUES (?, ?, ?, ?)
+            ''', (debt_id, amount, date, key))
+            
+            # Update the total paid amount
+            cursor.execute('''
+            UPDATE debts
+            SET paid = paid + ?
+            WHERE id = ?
+            ''', (amount, debt_id))
+            return True
+        
+        # Take the write lock up front and retry with backoff while it is busy
+        try:
+            added = write_with_retry(lambda: connect_db(BUSY_TIMEOUT), write)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('view_debt', debt_id=debt_id))
+        if added:
+            flash(f'Payment of ${amount:.2f} added successfully!', 'success')
+        else:
+            flash(f'Payment of ${amount:.2f} was already recorded', 'info')
         return redirect(url_for('view_debt', debt_id=debt_id))
     
     balance = db_debt['amount'] - db_debt['paid']
@@ -680,7 +932,68 @@ def add_payment(debt_id):
     conn.close()
     
     today = datetime.now().strftime('%Y-%m-%d')
-    return render_template('add_payment.html', debt=debt, today=today)
+    return render_template('add_payment.html', debt=debt, today=today, idempotency_key=uuid.uuid4().hex)
+
+def tracker_debt_record(debt):
+    """A debt row in the shape the index page shows it"""
+    return {
+        'id': debt['id'],
+        'name': debt['name'],
+        'amount': debt['amount'],
+        'balance': round(debt['amount'] - debt['paid'], 2),
+        'interest_rate': debt['interest_rate'],
+        'min_payment': debt['min_payment'],
+        'progress': round((debt['paid'] / debt['amount']) * 100, 1) if debt['amount'] > 0 else 0
+    }
+
+def tracker_payment_record(payment):
+    return {'id': payment['id'], 'debt_id': payment['debt_id'], 'amount': payment['amount'], 'date': payment['date']}
+
+def tracker_rows(table, ids):
+    """Rows of a table by ID, as a dict keyed by ID"""
+    ids = list(ids)
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    rows = {}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        for row in conn.execute(f'SELECT * FROM {table} WHERE id IN ({", ".join("?" * len(chunk))})', chunk):
+            rows[row['id']] = row
+    conn.close()
+    return rows
+
+def tracker_totals():
+    conn = connect_db()
+    total_debt, total_min_payment, debt_count = conn.execute(
+        'SELECT TOTAL(amount - paid), TOTAL(min_payment), COUNT(*) FROM debts').fetchone()
+    conn.close()
+    return {'total_debt': round(total_debt, 2), 'total_min_payment': round(total_min_payment, 2),
+            'debt_count': debt_count}
+
+def tracker_snapshot():
+    conn = connect_db()
+    conn.row_factory = sqlite3.Row
+    debts = [tracker_debt_record(debt) for debt in conn.execute('SELECT * FROM debts ORDER BY id')]
+    payments = [tracker_payment_record(row)
+                for row in conn.execute('SELECT * FROM payments ORDER BY date DESC, id DESC LIMIT 50')]
+    conn.close()
+    return {'debts': debts, 'payments': payments, 'totals': tracker_totals()}
+
+# Server-sent events for every committed write, see changefeed.ChangeFeed
+change_feed = ChangeFeed(
+    connect_db,
+    lambda ids: {debt_id: tracker_debt_record(row) for debt_id, row in tracker_rows('debts', ids).items()},
+    lambda ids: {payment_id: tracker_payment_record(row) for payment_id, row in tracker_rows('payments', ids).items()},
+    tracker_totals,
+    tracker_snapshot
+)
+
+@app.route('/api/changes')
+def change_stream():
+    """Server-sent events with debt and payment changes as they commit"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    return Response(change_feed.stream(last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
     # Initialize the database
@@ -689,5 +1002,8 @@ if __name__ == '__main__':
     # Create templates
     create_templates()
     
+    # Prune the change log even while no client is subscribed
+    change_feed.start()
+    
     # Run the app
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Optional
+
+
+def portfolio_fingerprint(db_path: str) -> str:
+    """Digest of the state of the debts and payments tables, used to key cached results
+
+    The change log (changefeed.create_change_log) is appended to by triggers
+    on every insert, delete and displayed-column update of a debt and every
+    new payment, and its AUTOINCREMENT counter survives pruning, so its last
+    sequence number changes with every such write. Payment count and MAX(id)
+    also cover payments archived out of the table. Databases without a change
+    log are hashed row by row.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+    row = cursor.fetchone()
+    if row is not None:
+        debts = row[0]
+    else:
+        digest = hashlib.sha256()
+        for values in cursor.execute('SELECT * FROM debts ORDER BY id'):
+            digest.update(repr(values).encode('utf-8'))
+        debts = digest.hexdigest()
+    cursor.execute('SELECT COUNT(*), MAX(id) FROM payments')
+    payments = cursor.fetchone()
+    conn.close()
+
+    return hashlib.sha256(repr((debts, payments)).encode('utf-8')).hexdigest()[:16]
+
+
+class JobQueue:
+    """SQLite-backed queue for heavy computations, executed on a process pool
+
+    Jobs are identified by a hash of their kind, parameters and a data
+    fingerprint, so submitting the same work twice returns the existing job
+    and finished results are served from the jobs table until the inputs
+    change. Jobs left queued or running by a previous process are resubmitted
+    on start-up. Finished jobs older than ``retention`` seconds are purged on
+    the first submit and then at most hourly.
+    """
+
+    def __init__(self, db_path="jobs.db", max_workers=2, retention=86400.0):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.retention = retention
+        self._purged_at = 0.0
+        self._handlers = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.initialize_db()
+
+    def initialize_db(self):
+        """Create the jobs table if it doesn't exist"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+
+        conn.commit()
+        conn.close()
+
+    def register(self, kind: str, func):
+        """Register a top-level (picklable) function that runs jobs of this kind
+
+        The function is called with the job parameters as keyword arguments and
+        must return something JSON-serializable.
+        """
+        self._handlers[kind] = func
+
+    def start(self):
+        """Start the worker pool and resubmit unfinished jobs"""
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        cursor.execute("SELECT id, kind, params FROM jobs WHERE status = 'queued' ORDER BY created_at")
+        pending = cursor.fetchall()
+        conn.commit()
+        conn.close()
+
+        for job_id, kind, params in pending:
+            if kind in self._handlers:
+                with self._lock:
+                    self._futures[job_id] = None
+                self._dispatch(job_id, kind, json.loads(params))
+
+    def close(self, wait=True):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    @staticmethod
+    def job_key(kind: str, params: dict, fingerprint: str = "") -> str:
+        """Deterministic job ID for a kind, parameters and data fingerprint"""
+        payload = json.dumps([kind, params, fingerprint], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def submit(self, kind: str, params: dict, fingerprint: str = "") -> dict:
+        """Submit a job, or return the existing one for identical inputs
+
+        Returns the job record; its status is "done" with a result when the
+        computation was already cached.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        if self._executor is None:
+            self.start()
+        if time.time() - self._purged_at >= min(self.retention, 3600.0):
+            self.purge(self.retention)
+
+        job_id = self.job_key(kind, params, fingerprint)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT OR IGNORE INTO jobs (id, kind, params, status, created_at)
+        VALUES (?, ?, ?, 'queued', ?)
+        ''', (job_id, kind, json.dumps(params, sort_keys=True), time.time()))
+        created = cursor.rowcount > 0
+
+        # A failed job is retried when it is submitted again
+        if not created:
+            cursor.execute('''
+            UPDATE jobs SET status = 'queued', error = NULL, created_at = ?
+            WHERE id = ? AND status = 'failed'
+            ''', (time.time(), job_id))
+            created = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+
+        # Claim the dispatch under the lock so concurrent submitters start it once
+        with self._lock:
+            dispatch = job_id not in self._futures and (created or self._status(job_id) == 'queued')
+            if dispatch:
+                self._futures[job_id] = None
+        if dispatch:
+            self._dispatch(job_id, kind, params)
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job record, including its decoded result once finished"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval=0.05) -> Optional[dict]:
+        """Block until a job finishes or the timeout expires, then return its record"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except FuturesTimeoutError:
+                return self.get(job_id)
+            except Exception:
+                # Failures are recorded on the job by _finish
+                pass
+            # The completion callback may still be writing the result
+            deadline = time.monotonic() + 1.0
+            while self._status(job_id) in ('queued', 'running') and time.monotonic() < deadline:
+                time.sleep(poll_interval)
+            return self.get(job_id)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._status(job_id) in ('queued', 'running'):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+        return self.get(job_id)
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that completed more than older_than seconds ago"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?
+        ''', (time.time() - older_than,))
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        self._purged_at = time.time()
+        if deleted:
+            print(f"Purged {deleted} finished jobs")
+        return deleted
+
+    def _status(self, job_id: str) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def _dispatch(self, job_id: str, kind: str, params: dict):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job_id))
+        conn.commit()
+        conn.close()
+
+        future = self._executor.submit(self._handlers[kind], **params)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+
+    def _finish(self, job_id: str, future):
+        start_time = time.time()
+
+        try:
+            result = json.dumps(future.result())
+            status, error = 'done', None
+        except Exception as e:
+            result, status, error = None, 'failed', f"{type(e).__name__}: {e}"
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('''
+        UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?
+        WHERE id = ?
+        ''', (status, result, error, time.time(), job_id))
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+        execution_time = time.time() - start_time
+        print(f"Job {job_id[:8]} {status} (result stored in {execution_time:.4f} seconds)")
@@ -0,0 +1,61 @@
+import time
+
+from write_retry import write_with_retry
+
+
+def schema_version(conn) -> int:
+    """Schema version stored in the database header (0 for a new or pre-migration database)"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(connect, migrations, label="database") -> int:
+    """Bring a database up to the newest of ``migrations`` and return its version
+
+    migrations is a list of (version, description, migrate(cursor)) in
+    ascending version order. When the schema is current this is a single
+    PRAGMA user_version read. Otherwise each pending migration runs in a
+    BEGIN IMMEDIATE transaction of its own that also bumps user_version, so
+    a migration is applied exactly once even when several processes start
+    together, and readers keep working from the WAL while it runs.
+
+    Databases created before versioning are at version 0, so every
+    migration must also cope with tables and columns that already exist.
+    """
+    latest = migrations[-1][0]
+
+    conn = connect()
+    try:
+        version = schema_version(conn)
+        if version >= latest:
+            return version
+
+        # Journal mode can't change inside a transaction; it persists in the file
+        conn.execute('PRAGMA journal_mode=WAL')
+    finally:
+        conn.close()
+
+    start_time = time.time()
+    applied = 0
+
+    for migration_version, description, migrate in migrations:
+        if migration_version <= version:
+            continue
+
+        def step(cursor):
+            # Another process may have applied it while this one waited for the lock
+            if schema_version(cursor) >= migration_version:
+                return False
+            migrate(cursor)
+            cursor.execute(f'PRAGMA user_version = {int(migration_version)}')
+            return True
+
+        if write_with_retry(connect, step):
+            applied += 1
+            print(f"Applied migration {migration_version} to {label}: {description}")
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Schema of {label} migrated from version {version} to {latest} in {execution_time:.4f} seconds "
+          f"({applied} migrations applied)")
+
+    return latest
@@ -0,0 +1,305 @@
+import collections
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+from flask import g, request, jsonify, send_file
+
+from sqltrace import start_trace, stop_trace, current_trace
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval
+
+    Samples are aggregated as collapsed stacks ("outer;inner;leaf" -> count),
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Profile in collapsed-stack format, one "stack count" line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=15) -> dict:
+        """Functions with the most samples, as self (leaf) and inclusive counts"""
+        self_counts = collections.Counter()
+        inclusive_counts = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for function in set(frames):
+                inclusive_counts[function] += count
+
+        def rows(counter):
+            return [{
+                'function': function,
+                'samples': count,
+                'percent': round(count / self.samples * 100, 1) if self.samples else 0.0,
+                'ms': round(count * self.interval * 1000, 1)
+            } for function, count in counter.most_common(limit)]
+
+        return {'self': rows(self_counts), 'inclusive': rows(inclusive_counts)}
+
+
+class RequestProfiler:
+    """Opt-in sampling profiler for Flask routes
+
+    A request is profiled when it carries the ``header`` (whose value must
+    match ``token`` if one is configured) or when it is picked at
+    ``sample_rate``. Each profile is written to ``output_dir`` as a
+    collapsed-stack ``.folded`` file, and a summary of the top functions is
+    kept for the last ``history`` profiles under /admin/profiles.
+    """
+
+    def __init__(self, sample_rate=0.0, output_dir="profiles", interval=0.005, history=100,
+                 header="X-Profile", token=None):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.interval = interval
+        self.header = header
+        self.token = token
+        self.profiles = collections.OrderedDict()
+        self.history = history
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestProfiler"]:
+        """Profiler configured from DEBT_PROFILE_* variables, or None unless DEBT_PROFILING=1"""
+        if os.environ.get('DEBT_PROFILING') != '1':
+            return None
+        return cls(
+            sample_rate=float(os.environ.get('DEBT_PROFILE_SAMPLE_RATE', '0')),
+            output_dir=os.environ.get('DEBT_PROFILE_DIR', 'profiles'),
+            interval=float(os.environ.get('DEBT_PROFILE_INTERVAL', '0.005')),
+            token=os.environ.get('DEBT_PROFILE_TOKEN') or None
+        )
+
+    def init_app(self, app):
+        """Install the request hooks and the admin endpoints on a Flask app"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/admin/profiles', 'admin_profiles', self._list_profiles)
+        app.add_url_rule('/admin/profiles/<int:profile_id>', 'admin_profile', self._get_profile)
+        app.add_url_rule('/admin/profiles/<int:profile_id>/folded', 'admin_profile_folded', self._get_folded)
+
+    def _authorized(self, value) -> bool:
+        return self.token is None or value == self.token
+
+    def _wants_profile(self) -> bool:
+        if request.path.startswith('/admin/profiles'):
+            return False
+        value = request.headers.get(self.header)
+        if value is not None:
+            return self._authorized(value)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _before_request(self):
+        if self._wants_profile():
+            g.profile_sampler = StackSampler(threading.get_ident(), self.interval)
+            g.profile_started = time.time()
+            g.profile_sampler.start()
+
+    def _after_request(self, response):
+        sampler = g.pop('profile_sampler', None)
+        if sampler is None:
+            return response
+        sampler.stop()
+        duration = time.time() - g.pop('profile_started')
+
+        profile_id = next(self._ids)
+        os.makedirs(self.output_dir, exist_ok=True)
+        endpoint = (request.endpoint or 'unknown').replace('.', '_')
+        path = os.path.join(self.output_dir, f"{int(time.time())}-{profile_id}-{endpoint}.folded")
+        with open(path, 'w') as f:
+            f.write(sampler.collapsed())
+
+        summary = {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'samples': sampler.samples,
+            'interval_ms': self.interval * 1000,
+            'file': path,
+            'top_functions': sampler.top_functions()
+        }
+        with self._lock:
+            self.profiles[profile_id] = summary
+            while len(self.profiles) > self.history:
+                self.profiles.popitem(last=False)
+
+        response.headers['X-Profile-Id'] = str(profile_id)
+        print(f"Profiled {request.method} {request.path} in {duration:.4f} seconds "
+              f"({sampler.samples} samples, written to {path})")
+        return response
+
+    def _admin_denied(self):
+        if self._authorized(request.headers.get('X-Profile-Token', request.args.get('token'))):
+            return None
+        return jsonify({'error': 'Invalid profile token'}), 403
+
+    def _list_profiles(self):
+        denied = self._admin_denied()
+        if denied:
+            return denied
+        with self._lock:
+            profiles = list(self.profiles.values())
+        return jsonify([{key: value for key, value in profile.items() if key != 'top_functions'}
+                        for profile in reversed(profiles)])
+
+    def _get_profile(self, profile_id):
+        denied = self._admin_denied()
+        if denied:
+            return denied
+        profile = self.profiles.get(profile_id)
+        if profile is None:
+            return jsonify({'error': f'Profile {profile_id} not found'}), 404
+        return jsonify(profile)
+
+    def _get_folded(self, profile_id):
+        denied = self._admin_denied()
+        if denied:
+            return denied
+        profile = self.profiles.get(profile_id)
+        if profile is None or not os.path.exists(profile['file']):
+            return jsonify({'error': f'Profile {profile_id} not found'}), 404
+        return send_file(os.path.abspath(profile['file']), mimetype='text/plain')
+
+
+class RequestSQLTracer:
+    """Per-request SQL tracing for Flask apps
+
+    Every request served while installed gets a trace. Query counts are
+    returned in X-SQL-Queries / X-SQL-Time headers, repeated and N+1
+    queries are logged, and the last ``history`` traces are kept under
+    /admin/sql. Statements slower than ``slow_ms`` get their EXPLAIN QUERY
+    PLAN captured when ``explain`` is set.
+    """
+
+    def __init__(self, slow_ms=50.0, explain=False, n_plus_one_threshold=5, history=100, token=None):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.history = history
+        self.token = token
+        self.traces = collections.OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestSQLTracer"]:
+        """Tracer configured from DEBT_SQL_* variables, or None unless DEBT_SQL_TRACE=1"""
+        if os.environ.get('DEBT_SQL_TRACE') != '1':
+            return None
+        return cls(
+            slow_ms=float(os.environ.get('DEBT_SQL_SLOW_MS', '50')),
+            explain=os.environ.get('DEBT_SQL_EXPLAIN') == '1',
+            n_plus_one_threshold=int(os.environ.get('DEBT_SQL_N_PLUS_ONE', '5')),
+            token=os.environ.get('DEBT_PROFILE_TOKEN') or None
+        )
+
+    def init_app(self, app):
+        """Install the request hooks and the admin endpoints on a Flask app"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/admin/sql', 'admin_sql_traces', self._list_traces)
+        app.add_url_rule('/admin/sql/<int:trace_id>', 'admin_sql_trace', self._get_trace)
+
+    def _before_request(self):
+        if not request.path.startswith('/admin/sql'):
+            start_trace(self.slow_ms, self.explain, self.n_plus_one_threshold)
+
+    def _after_request(self, response):
+        trace = current_trace()
+        if trace is None:
+            return response
+        stop_trace(trace)
+
+        summary = trace.summary()
+        trace_id = next(self._ids)
+        record = {
+            'id': trace_id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            **summary,
+            'statements': [{**entry, 'duration_ms': round(entry['duration_ms'], 3)} for entry in trace.statements]
+        }
+        with self._lock:
+            self.traces[trace_id] = record
+            while len(self.traces) > self.history:
+                self.traces.popitem(last=False)
+
+        response.headers['X-SQL-Queries'] = str(summary['queries'])
+        response.headers['X-SQL-Time'] = f"{summary['duration_ms']:.3f}"
+        for finding in summary['n_plus_one']:
+            print(f"Possible N+1 in {request.method} {request.path}: {finding['count']} x {finding['sql'][:80]} "
+                  f"from {', '.join(finding['callers'])}")
+        for finding in summary['repeated']:
+            print(f"Repeated query in {request.method} {request.path}: {finding['count']} x {finding['sql'][:80]} "
+                  f"from {', '.join(finding['callers'])}")
+        return response
+
+    def _admin_denied(self):
+        if self.token is None or request.headers.get('X-Profile-Token', request.args.get('token')) == self.token:
+            return None
+        return jsonify({'error': 'Invalid profile token'}), 403
+
+    def _list_traces(self):
+        denied = self._admin_denied()
+        if denied:
+            return denied
+        with self._lock:
+            traces = list(self.traces.values())
+        return jsonify([{
+            'id': trace['id'], 'method': trace['method'], 'path': trace['path'], 'status': trace['status'],
+            'queries': trace['queries'], 'connections': trace['connections'], 'duration_ms': trace['duration_ms'],
+            'rows': trace['rows'], 'repeated': len(trace['repeated']), 'n_plus_one': len(trace['n_plus_one']),
+            'slow': len(trace['slow'])
+        } for trace in reversed(traces)])
+
+    def _get_trace(self, trace_id):
+        denied = self._admin_denied()
+        if denied:
+            return denied
+        trace = self.traces.get(trace_id)
+        if trace is None:
+            return jsonify({'error': f'Trace {trace_id} not found'}), 404
+        return jsonify(trace)
@@ -0,0 +1,382 @@
+import argparse
+import contextlib
+import csv
+import dataclasses
+import datetime
+import html
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from matplotlib.figure import Figure
+
+from debt_manager import DebtManager, Debt
+from snapshot import write_snapshot, load_snapshot
+
+# Months of the projected schedule shown in a statement; the CSV has all of them
+STATEMENT_PLAN_MONTHS = 24
+
+SUMMARY_HEADER = ['ID', 'Name', 'Balance', 'Interest Rate', 'Min Payment', 'Total Paid', 'Payments',
+                  'Months to Payoff', 'Payoff Date', 'Projected Interest']
+
+STATEMENT_STYLE = '''
+body { font-family: sans-serif; margin: 2em; color: #111827; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #d1d5db; padding: 0.25em 0.75em; text-align: right; }
+th { background: #f3f4f6; }
+td.label { text-align: left; }
+'''
+
+# Per-process state of a report worker, set by _init_worker
+_worker = {}
+
+
+def _init_worker(snapshot_path: str, db_path: str, ledger_mode: str):
+    """Open the shared snapshot once per worker process"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker['snapshot'] = load_snapshot(snapshot_path)
+        _worker['debt_manager'] = DebtManager(db_path, ledger_mode=ledger_mode)
+
+
+def _balance_matches(balance: float, min_balance=None, max_balance=None, paid_off=None) -> bool:
+    """Whether a balance passes the iter_debts() balance filters"""
+    if min_balance is not None and balance < min_balance:
+        return False
+    if max_balance is not None and balance > max_balance:
+        return False
+    return paid_off is None or (balance <= 0) == paid_off
+
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+
+def plan_chart(plan, debt: Debt) -> bytes:
+    """PNG of the balance, cumulative payments and cumulative interest of a plan
+
+    The figure is built once per process and only its data and title change
+    between debts, which saves about a fifth of the rendering time.
+    """
+    if 'chart' not in _worker:
+        fig = Figure(figsize=(8, 4.5))
+        ax = fig.add_subplot(1, 1, 1)
+        lines = [ax.plot([], [], label=label, color=color)[0]
+                 for label, color in (('Balance', 'red'), ('Payments Made', 'green'), ('Interest Paid', 'orange'))]
+        ax.set_xlabel('Months')
+        ax.set_ylabel('Amount ($)')
+        ax.legend()
+        ax.grid(True)
+        _worker['chart'] = (fig, ax, lines)
+    fig, ax, lines = _worker['chart']
+
+    balance, payments, interest = lines
+    balance.set_data(plan['Month'], plan['Balance'])
+    payments.set_data(plan['Month'], plan['Payment'].cumsum())
+    interest.set_data(plan['Month'], plan['Interest'].cumsum())
+    ax.relim()
+    ax.autoscale_view()
+    ax.set_title(f'Debt Payoff Plan: {debt.name}')
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=80)
+    return buf.getvalue()
+
+
+def plan_dates(as_of: datetime.date, months: int) -> List[str]:
+    """Dates of plan months 1..months, same day of the month as as_of (or the month's last day)
+
+    The vectorized equivalent of as_of + relativedelta(months=month) for each month.
+    """
+    month_starts = np.datetime64(as_of, 'M') + np.arange(1, months + 1)
+    days_in_month = ((month_starts + 1).astype('datetime64[D]') - month_starts.astype('datetime64[D]')).astype(int)
+    days = np.minimum(as_of.day, days_in_month) - 1
+    return (month_starts.astype('datetime64[D]') + days).astype(str).tolist()
+
+
+def render_statement(debt: Debt, payments: List[tuple], plan, as_of: datetime.date, strategy: str,
+                     chart=True) -> tuple:
+    """Statement files of one debt and its summary row; returns ({file name: bytes}, row)
+
+    payments are (payment_date, amount) tuples. The files are
+    statement.html, schedule.csv with the whole projected schedule and,
+    with chart, plan.png.
+    """
+    months = len(plan)
+    payoff_date = (as_of + relativedelta(months=months)).isoformat() if months else None
+    projected_interest = round(float(plan['Interest'].sum()), 2) if months else 0.0
+    payments = sorted(payments)
+
+    dates = plan_dates(as_of, months)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(['Month', 'Date', 'Payment', 'Interest', 'Balance'])
+    writer.writerows(zip(plan['Month'].tolist(), dates, plan['Payment'].round(2).tolist(),
+                         plan['Interest'].round(2).tolist(), plan['Balance'].round(2).tolist()))
+    files = {'schedule.csv': buf.getvalue().encode('utf-8')}
+    if chart and months:
+        files['plan.png'] = plan_chart(plan, debt)
+
+    summary = [
+        ('Balance', _money(debt.current_balance)),
+        ('Principal', _money(debt.principal)),
+        ('Total paid', _money(debt.total_paid)),
+        ('Interest rate', f"{debt.interest_rate}%"),
+        ('Minimum payment', _money(debt.min_payment)),
+        ('Monthly interest', _money(debt.monthly_interest)),
+        ('Payoff', f"{months} months ({payoff_date}, {strategy} strategy)" if months else "Paid off"),
+        ('Projected interest', _money(projected_interest))
+    ]
+    history = ''.join(f"<tr><td class='label'>{html.escape(date)}</td><td>{_money(amount)}</td></tr>"
+                      for date, amount in payments) or "<tr><td colspan='2'>No payments recorded</td></tr>"
+    schedule = ''.join(
+        f"<tr><td>{month}</td><td class='label'>{date}</td><td>{_money(payment)}</td>"
+        f"<td>{_money(interest)}</td><td>{_money(balance)}</td></tr>"
+        for month, date, payment, interest, balance in zip(
+            plan['Month'][:STATEMENT_PLAN_MONTHS], dates, plan['Payment'], plan['Interest'], plan['Balance']))
+
+    name = html.escape(debt.name)
+    files['statement.html'] = f'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Statement: {name}</title><style>{STATEMENT_STYLE}</style></head>
+<body>
+<h1>{name}</h1>
+<p>Statement as of {as_of.isoformat()} for debt #{debt.id}, opened {html.escape(debt.creation_date)}</p>
+<table>{''.join(f"<tr><th class='label'>{label}</th><td>{value}</td></tr>" for label, value in summary)}</table>
+<h2>Payment history</h2>
+<table><tr><th>Date</th><th>Amount</th></tr>{history}</table>
+<h2>Projected schedule</h2>
+{'<img src="plan.png" alt="Payoff plan">' if 'plan.png' in files else ''}
+<table><tr><th>Month</th><th>Date</th><th>Payment</th><th>Interest</th><th>Balance</th></tr>{schedule}</table>
+<p><a href="schedule.csv">Full schedule ({months} months)</a></p>
+</body></html>
+'''.encode('utf-8')
+
+    row = [debt.id, debt.name, round(debt.current_balance, 2), debt.interest_rate, debt.min_payment,
+           debt.total_paid, len(payments), months, payoff_date, projected_interest]
+    return files, row
+
+
+def _render_chunk(debt_ids: List[int], payments: Dict[int, list], paid_later: Dict[int, float], as_of: str,
+                  strategy: str, chart: bool) -> list:
+    """Worker task: statements for a chunk of debts read from the shared snapshot
+
+    paid_later is what each debt was paid after as_of; it is taken back out
+    of the snapshot's total paid so balances and plans are as of that date.
+    """
+    snapshot = _worker['snapshot']
+    debt_manager = _worker['debt_manager']
+    as_of = datetime.date.fromisoformat(as_of)
+
+    results = []
+    for debt_id in debt_ids:
+        position = snapshot.position(debt_id)
+        if position < 0:
+            continue
+        debt = snapshot.debt(position)
+        if paid_later.get(debt_id):
+            debt = dataclasses.replace(debt, total_paid=round(debt.total_paid - paid_later[debt_id], 2))
+        plan = debt_manager.build_payment_plan(debt, strategy)
+        files, row = render_statement(debt, payments.get(debt_id, []), plan, as_of, strategy, chart)
+        results.append((debt_id, files, row))
+    return results
+
+
+class _DirectoryWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name, data: bytes):
+        path = os.path.join(self.path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+class _ZipWriter:
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6)
+
+    def write(self, name, data: bytes):
+        # PNGs are compressed already
+        compression = zipfile.ZIP_STORED if name.endswith('.png') else zipfile.ZIP_DEFLATED
+        self.archive.writestr(name, data, compress_type=compression)
+
+    def close(self):
+        self.archive.close()
+
+
+def generate_reports(debt_manager: DebtManager, output: str, debt_ids: Optional[List[int]] = None,
+                     strategy="minimum", charts=True, workers: Optional[int] = None, chunk_size=50,
+                     as_of: Optional[str] = None, include_archived_payments=False, progress=None,
+                     **filters) -> dict:
+    """Write a statement for every selected debt, in parallel, plus summary.csv
+
+    Debts are all debts, the given debt_ids, or those matching iter_debts()
+    filters (min_balance, max_balance, min_rate, max_rate, paid_off).
+    Statements are as of the date as_of: payments after it are left out of
+    the history, the balance and the plan, the balance filters apply to the
+    balance on that date, and debts opened after it are skipped. The portfolio and payment
+    history are read in one unit of work; the debts go into a snapshot file
+    that every worker process maps, so workers share one copy of it and
+    read no debts or payments themselves (their DebtManager only builds
+    plans). Workers build the
+    plans, charts and HTML for chunks of chunk_size debts and the files are
+    written as they come back, to the directory ``output`` or, when it ends
+    in .zip, to that archive: debt_<id>/statement.html, plan.png and
+    schedule.csv for each debt.
+
+    progress(done, total, elapsed) is called after every chunk; by default
+    progress and throughput are printed about once a second. workers=1
+    renders in this process.
+    """
+    start_time = time.time()
+    as_of = as_of or datetime.date.today().isoformat()
+    day_after = (datetime.date.fromisoformat(as_of) + datetime.timedelta(days=1)).isoformat()
+    workers = workers or os.cpu_count() or 1
+
+    snapshot_fd, snapshot_path = tempfile.mkstemp(suffix='.snap', prefix='reports-')
+    os.close(snapshot_fd)
+    try:
+        with debt_manager.unit_of_work():
+            write_snapshot(debt_manager, snapshot_path, strategies=())
+
+            # Payments after as_of, archived or not, were counted in the debts' total paid
+            paid_later = {}
+            for payment in debt_manager.iter_payments(since=day_after, include_archived=True):
+                paid_later[payment.debt_id] = paid_later.get(payment.debt_id, 0.0) + payment.amount
+
+            # Debts are selected as they stood on as_of
+            balance_filters = {name: filters.pop(name) for name in ('min_balance', 'max_balance', 'paid_off')
+                               if filters.get(name) is not None}
+            if debt_ids is None:
+                candidates = debt_manager.iter_debts(**filters)
+            else:
+                candidates = debt_manager.get_debts_by_id(debt_ids)
+            debt_ids = [debt.id for debt in candidates
+                        if debt.creation_date[:10] <= as_of
+                        and _balance_matches(round(debt.current_balance + paid_later.get(debt.id, 0.0), 2),
+                                             **balance_filters)]
+            payments = {debt_id: [] for debt_id in debt_ids}
+            # A few debts are looked up one by one; otherwise one pass over all payments
+            if len(debt_ids) <= 100:
+                history = itertools.chain.from_iterable(
+                    debt_manager.iter_payments(debt_id=debt_id, until=as_of,
+                                               include_archived=include_archived_payments)
+                    for debt_id in debt_ids)
+            else:
+                history = debt_manager.iter_payments(until=as_of, order_by="debt_id",
+                                                     include_archived=include_archived_payments)
+            for payment in history:
+                if payment.debt_id in payments:
+                    payments[payment.debt_id].append((payment.payment_date, payment.amount))
+        load_time = time.time() - start_time
+
+        chunks = [debt_ids[i:i + chunk_size] for i in range(0, len(debt_ids), chunk_size)]
+        tasks = [(chunk, {debt_id: payments[debt_id] for debt_id in chunk},
+                  {debt_id: paid_later[debt_id] for debt_id in chunk if debt_id in paid_later}, as_of, strategy, charts)
+                 for chunk in chunks]
+        del payments
+
+        writer = _ZipWriter(output) if output.endswith('.zip') else _DirectoryWriter(output)
+        rows = []
+        last_report = time.time()
+        render_start = time.time()
+
+        def collect(results):
+            nonlocal last_report
+            for debt_id, files, row in results:
+                for name, data in files.items():
+                    writer.write(f"debt_{debt_id}/{name}", data)
+                rows.append(row)
+            elapsed = time.time() - render_start
+            if progress is not None:
+                progress(len(rows), len(debt_ids), elapsed)
+            elif time.time() - last_report >= 1.0 or len(rows) == len(debt_ids):
+                last_report = time.time()
+                print(f"Reports: {len(rows)}/{len(debt_ids)} debts ({len(rows) / max(elapsed, 1e-9):.1f} debts/s)")
+
+        try:
+            if workers == 1:
+                _init_worker(snapshot_path, debt_manager.db_path, debt_manager.ledger_mode)
+                for task in tasks:
+                    collect(_render_chunk(*task))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(snapshot_path, debt_manager.db_path,
+                                                   debt_manager.ledger_mode)) as executor:
+                    futures = [executor.submit(_render_chunk, *task) for task in tasks]
+                    for future in as_completed(futures):
+                        collect(future.result())
+
+            rows.sort(key=lambda row: row[0])
+            buf = io.StringIO()
+            csv_writer = csv.writer(buf)
+            csv_writer.writerow(SUMMARY_HEADER)
+            csv_writer.writerows(rows)
+            writer.write('summary.csv', buf.getvalue().encode('utf-8'))
+        finally:
+            writer.close()
+    finally:
+        if 'snapshot' in _worker:
+            _worker.pop('snapshot').close()
+            _worker.clear()
+        os.remove(snapshot_path)
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    throughput = len(rows) / execution_time if execution_time > 0 else 0.0
+    print(f"Reports for {len(rows)} debts written to {output} in {execution_time:.4f} seconds "
+          f"({throughput:.1f} debts/s, {workers} workers)")
+
+    return {
+        'output': output,
+        'debts': len(rows),
+        'workers': workers,
+        'load_seconds': round(load_time, 4),
+        'seconds': round(execution_time, 4),
+        'debts_per_second': round(throughput, 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate debt statements in bulk")
+    parser.add_argument("output", help="output directory, or a .zip archive")
+    parser.add_argument("--db", default="debt_management.db", help="database file")
+    parser.add_argument("--ledger-mode", choices=("float", "cents"), default="float")
+    parser.add_argument("--debt-id", type=int, action="append", dest="debt_ids", help="only this debt (repeatable)")
+    parser.add_argument("--min-balance", type=float)
+    parser.add_argument("--max-balance", type=float)
+    parser.add_argument("--min-rate", type=float)
+    parser.add_argument("--max-rate", type=float)
+    parser.add_argument("--strategy", choices=("minimum", "accelerated"), default="minimum")
+    parser.add_argument("--no-charts", action="store_true", help="skip the plan charts")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="debts per worker task")
+    parser.add_argument("--as-of", help="statement date (YYYY-MM-DD), default today")
+    parser.add_argument("--include-archived-payments", action="store_true")
+    args = parser.parse_args()
+
+    if args.as_of:
+        datetime.date.fromisoformat(args.as_of)
+    filters = {name: getattr(args, name) for name in ('min_balance', 'max_balance', 'min_rate', 'max_rate')
+               if getattr(args, name) is not None}
+    manager = DebtManager(args.db, ledger_mode=args.ledger_mode)
+    with contextlib.redirect_stdout(sys.stderr):
+        result = generate_reports(manager, args.output, args.debt_ids, strategy=args.strategy,
+                                  charts=not args.no_charts, workers=args.workers, chunk_size=args.chunk_size,
+                                  as_of=args.as_of, include_archived_payments=args.include_archived_payments,
+                                  **filters)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,208 @@
+import dataclasses
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from debt_manager import DebtManager, Debt
+
+
+class ScenarioBase:
+    """Snapshot of the stored portfolio that what-if scenarios are layered on
+
+    The debts are loaded once, in one unit of work, and copied so later
+    writes through the DebtManager don't show through. Every scenario made
+    from this base shares these Debt objects until it changes one of them.
+    """
+
+    def __init__(self, debt_manager: DebtManager):
+        start_time = time.time()
+
+        self.debt_manager = debt_manager
+        with debt_manager.unit_of_work():
+            self.debts = {debt.id: dataclasses.replace(debt) for debt in debt_manager.get_all_debts()}
+        self.loaded_at = time.time()
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+        print(f"Scenario base of {len(self.debts)} debts loaded in {execution_time:.4f} seconds")
+
+    def scenario(self, name="baseline") -> "Scenario":
+        """An empty scenario on top of this base"""
+        return Scenario(self, name)
+
+
+class Scenario:
+    """Copy-on-write overlay of hypothetical changes on a ScenarioBase
+
+    Only debts a scenario changes are copied into its overlay; the rest are
+    read from the base. Hypothetical debts get negative IDs so they can't
+    collide with stored ones. Nothing is ever written to the database.
+    """
+
+    def __init__(self, base: ScenarioBase, name="baseline"):
+        self.base = base
+        self.name = name
+        self.changes = []
+        # Debt ID -> changed Debt, or None once removed in this scenario
+        self._overlay: Dict[int, Optional[Debt]] = {}
+        # Overlay entries this scenario copied itself, as opposed to inherited by fork()
+        self._owned = set()
+        self._next_id = -1
+
+    def fork(self, name: str) -> "Scenario":
+        """A new scenario starting from this one's changes; the two diverge independently"""
+        child = Scenario(self.base, name)
+        child.changes = list(self.changes)
+        child._overlay = dict(self._overlay)
+        child._next_id = self._next_id
+        # Both now share the overlay's Debt objects, so each copies before its next write
+        self._owned.clear()
+        return child
+
+    def get_debt(self, debt_id: int) -> Optional[Debt]:
+        if debt_id in self._overlay:
+            return self._overlay[debt_id]
+        return self.base.debts.get(debt_id)
+
+    def debts(self) -> List[Debt]:
+        """The scenario's portfolio: base debts with overrides applied, then hypothetical ones"""
+        debts = []
+        for debt_id, debt in self.base.debts.items():
+            debt = self._overlay.get(debt_id, debt)
+            if debt is not None:
+                debts.append(debt)
+        debts.extend(debt for debt_id, debt in self._overlay.items()
+                     if debt_id not in self.base.debts and debt is not None)
+        return debts
+
+    def _writable(self, debt_id: int) -> Debt:
+        """The scenario's own copy of a debt, made on first write"""
+        debt = self.get_debt(debt_id)
+        if debt is None:
+            raise ValueError(f"No debt found with ID: {debt_id}")
+        if debt_id not in self._owned:
+            debt = dataclasses.replace(debt)
+            self._overlay[debt_id] = debt
+            self._owned.add(debt_id)
+        return debt
+
+    def add_debt(self, name: str, principal: float, interest_rate: float, min_payment: float) -> int:
+        """Add a hypothetical debt; returns its (negative) ID"""
+        if principal <= 0 or min_payment <= 0 or interest_rate < 0:
+            raise ValueError("principal and minimum payment must be positive, interest rate non-negative")
+
+        debt_id = self._next_id
+        self._next_id -= 1
+        self._overlay[debt_id] = Debt(id=debt_id, name=name, principal=principal,
+                                      interest_rate=interest_rate, min_payment=min_payment)
+        self._owned.add(debt_id)
+        self.changes.append({'op': 'add_debt', 'debt_id': debt_id, 'name': name, 'principal': principal,
+                             'interest_rate': interest_rate, 'min_payment': min_payment})
+        return debt_id
+
+    def add_payment(self, debt_id: int, amount: float) -> float:
+        """Apply a hypothetical payment today; returns the new balance"""
+        if amount <= 0:
+            raise ValueError("payment amount must be positive")
+
+        debt = self._writable(debt_id)
+        if amount > round(debt.current_balance, 2):
+            raise ValueError(f"payment of {amount:.2f} exceeds the balance of {debt.current_balance:.2f}")
+        debt.total_paid = round(debt.total_paid + amount, 2)
+        self.changes.append({'op': 'pay', 'debt_id': debt_id, 'amount': amount})
+        return debt.current_balance
+
+    def set_interest_rate(self, debt_id: int, interest_rate: float):
+        if interest_rate < 0:
+            raise ValueError("interest rate must be non-negative")
+        self._writable(debt_id).interest_rate = interest_rate
+        self.changes.append({'op': 'set_interest_rate', 'debt_id': debt_id, 'interest_rate': interest_rate})
+
+    def set_min_payment(self, debt_id: int, min_payment: float):
+        if min_payment <= 0:
+            raise ValueError("minimum payment must be positive")
+        self._writable(debt_id).min_payment = min_payment
+        self.changes.append({'op': 'set_min_payment', 'debt_id': debt_id, 'min_payment': min_payment})
+
+    def remove_debt(self, debt_id: int):
+        """Leave a debt out of the scenario, e.g. one paid off by refinancing"""
+        if self.get_debt(debt_id) is None:
+            raise ValueError(f"No debt found with ID: {debt_id}")
+        self._overlay[debt_id] = None
+        self._owned.add(debt_id)
+        self.changes.append({'op': 'remove_debt', 'debt_id': debt_id})
+
+    def apply(self, changes: List[dict]) -> "Scenario":
+        """Apply changes given as dicts, in the format recorded in ``changes``"""
+        for change in changes:
+            change = dict(change)
+            op = change.pop('op', None)
+            if op == 'add_debt':
+                # Recorded changes carry the assigned ID; a new one is assigned here
+                change.pop('debt_id', None)
+                self.add_debt(**change)
+            elif op == 'pay':
+                self.add_payment(**change)
+            elif op in ('set_interest_rate', 'set_min_payment', 'remove_debt'):
+                getattr(self, op)(**change)
+            else:
+                raise ValueError(f"Unknown scenario change: {op}")
+        return self
+
+    def payment_plan(self, debt_id: int, strategy="minimum") -> pd.DataFrame:
+        """Payment plan for one debt as it stands in this scenario"""
+        debt = self.get_debt(debt_id)
+        if debt is None:
+            raise ValueError(f"No debt found with ID: {debt_id}")
+        if debt_id in self._overlay:
+            # Changed and hypothetical debts must not replace the stored debt's cached plan
+            debt = dataclasses.replace(debt, id=None)
+        return self.base.debt_manager.build_payment_plan(debt, strategy)
+
+    def compare(self, extra_payment=0) -> dict:
+        """compare_payoff_strategies() over this scenario's portfolio"""
+        return self.base.debt_manager.compare_payoff_strategies(extra_payment, self.debts())
+
+    def summary(self) -> dict:
+        debts = self.debts()
+        return {
+            'name': self.name,
+            'debt_count': len(debts),
+            'total_balance': round(sum(debt.current_balance for debt in debts), 2),
+            'total_min_payment': round(sum(debt.min_payment for debt in debts), 2),
+            'changes': list(self.changes)
+        }
+
+
+def compare_scenarios(scenarios: List[Scenario], extra_payment=0) -> List[dict]:
+    """Compare scenarios side by side
+
+    Each entry holds the scenario summary and its strategy comparison. The
+    first scenario is the reference: every other one also gets the change in
+    months and interest of each strategy relative to it.
+    """
+    start_time = time.time()
+
+    results = []
+    for scenario in scenarios:
+        results.append({**scenario.summary(), 'comparison': scenario.compare(extra_payment)})
+
+    reference = results[0]['comparison'] if results else {}
+    for result in results[1:]:
+        comparison = result['comparison']
+        if not comparison or not reference:
+            continue
+        result['vs_reference'] = {
+            strategy: {
+                'months': comparison[strategy]['months'] - reference[strategy]['months'],
+                'interest_paid': comparison[strategy]['interest_paid'] - reference[strategy]['interest_paid']
+            }
+            for strategy in ('avalanche', 'snowball', 'optimized')
+        }
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"{len(scenarios)} scenarios compared in {execution_time:.4f} seconds")
+
+    return results
@@ -0,0 +1,271 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from dateutil.relativedelta import relativedelta
+
+from debt_manager import DebtManager, Debt
+
+
+def debt_state_hash(debt: Debt) -> str:
+    """Digest of the fields a projection depends on"""
+    state = (debt.principal, debt.total_paid, debt.interest_rate, debt.min_payment)
+    return hashlib.sha1(repr(state).encode('utf-8')).hexdigest()
+
+
+def payoff_date(months: int, now: Optional[datetime.datetime] = None) -> str:
+    """Date a plan of ``months`` monthly payments starting now pays off"""
+    return ((now or datetime.datetime.now()) + relativedelta(months=months)).strftime("%Y-%m-%d")
+
+
+class ProjectionScheduler:
+    """Recomputes and persists payoff projections on a cadence
+
+    Projections are stored per debt and strategy together with a hash of the
+    debt state they were computed from, so a run only replans debts that
+    changed since the previous run. Portfolio strategy comparisons are stored
+    the same way, keyed by the extra monthly payment. Both tables are part of
+    the DebtManager schema (see SCHEMA_MIGRATIONS).
+
+    A run is triggered when any configured cadence is due: every ``interval``
+    seconds, once a day after ``nightly_at`` ("HH:MM", local time), or after
+    ``after_writes`` writes through the DebtManager.
+    """
+
+    def __init__(self, debt_manager: DebtManager, interval=None, nightly_at=None, after_writes=None,
+                 strategies=("minimum", "accelerated"), extra_payments=(0,), poll_interval=1.0):
+        self.debt_manager = debt_manager
+        self.interval = interval
+        self.nightly_at = datetime.datetime.strptime(nightly_at, "%H:%M").time() if nightly_at else None
+        self.after_writes = after_writes
+        self.strategies = tuple(strategies)
+        self.extra_payments = tuple(extra_payments)
+        self.poll_interval = poll_interval
+
+        self.last_run = None
+        self.writes_since_run = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        debt_manager.add_write_listener(self._on_write)
+
+    def start(self):
+        """Run the scheduler in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="projection-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_due(self, now: Optional[datetime.datetime] = None) -> bool:
+        """Whether any configured cadence calls for a run"""
+        now = now or datetime.datetime.now()
+
+        if self.last_run is None:
+            return True
+        if self.after_writes and self.writes_since_run >= self.after_writes:
+            return True
+        if self.interval and (now - self.last_run).total_seconds() >= self.interval:
+            return True
+        if self.nightly_at:
+            todays_run = datetime.datetime.combine(now.date(), self.nightly_at)
+            if self.last_run < todays_run <= now:
+                return True
+        return False
+
+    def run_once(self) -> dict:
+        """Recompute projections for changed debts and portfolio comparisons"""
+        start_time = time.time()
+
+        with self._lock:
+            self.writes_since_run = 0
+        self.last_run = datetime.datetime.now()
+
+        debts = self.debt_manager.get_all_debts()
+        states = {debt.id: debt_state_hash(debt) for debt in debts}
+
+        conn = sqlite3.connect(self.debt_manager.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT debt_id, strategy, state_hash FROM projections')
+        stored = {(debt_id, strategy): state for debt_id, strategy, state in cursor.fetchall()}
+
+        rows = []
+        for debt in debts:
+            for strategy in self.strategies:
+                if stored.get((debt.id, strategy)) != states[debt.id]:
+                    rows.append(self._project(debt, strategy, states[debt.id]))
+
+        cursor.executemany('''
+        INSERT OR REPLACE INTO projections
+            (debt_id, strategy, state_hash, months, payoff_date, total_interest, total_payments, computed_at)
+        VALUES (:debt_id, :strategy, :state_hash, :months, :payoff_date, :total_interest, :total_payments, :computed_at)
+        ''', rows)
+
+        # Forget debts that no longer exist
+        stale = {debt_id for debt_id, _ in stored} - set(states)
+        cursor.executemany('DELETE FROM projections WHERE debt_id = ?', [(debt_id,) for debt_id in stale])
+
+        portfolio_state = self._portfolio_state(states)
+        cursor.execute('SELECT extra_payment, state_hash FROM portfolio_projections')
+        stored_portfolio = dict(cursor.fetchall())
+        portfolio_updates = 0
+        for extra_payment in self.extra_payments:
+            if stored_portfolio.get(float(extra_payment)) != portfolio_state:
+                result = self.debt_manager.compare_payoff_strategies(extra_payment)
+                cursor.execute('''
+                INSERT OR REPLACE INTO portfolio_projections (extra_payment, state_hash, result, computed_at)
+                VALUES (?, ?, ?, ?)
+                ''', (float(extra_payment), portfolio_state, json.dumps(result), time.time()))
+                portfolio_updates += 1
+
+        conn.commit()
+        conn.close()
+
+        end_time = time.time()
+        execution_time = end_time - start_time
+        print(f"Projections refreshed in {execution_time:.4f} seconds: "
+              f"{len(rows)} debt projections, {portfolio_updates} portfolio comparisons")
+
+        return {'debt_projections': len(rows), 'portfolio_projections': portfolio_updates,
+                'removed': len(stale)}
+
+    def get_debt_projections(self, debts: List[Debt], strategy="minimum") -> List[dict]:
+        """Stored projections for the given debts, computed live where missing or stale
+
+        Each projection carries ``computed_at`` and ``source`` ("precomputed" or
+        "live") so pages can show how fresh the numbers are.
+        """
+        conn = sqlite3.connect(self.debt_manager.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM projections WHERE strategy = ?', (strategy,))
+        stored = {row['debt_id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+
+        projections = []
+        for debt in debts:
+            state = debt_state_hash(debt)
+            projection = stored.get(debt.id)
+            if projection and projection['state_hash'] == state:
+                # A plan starts from the current month, so the date moves on while the months hold
+                projection['payoff_date'] = payoff_date(projection['months'])
+                projection['source'] = 'precomputed'
+            else:
+                projection = self._project(debt, strategy, state)
+                projection['source'] = 'live'
+            projections.append(projection)
+
+        return projections
+
+    def get_strategy_comparison(self, extra_payment=0) -> dict:
+        """Stored strategy comparison, or a live one if the portfolio changed"""
+        debts = self.debt_manager.get_all_debts()
+        state = self._portfolio_state({debt.id: debt_state_hash(debt) for debt in debts})
+
+        conn = sqlite3.connect(self.debt_manager.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT state_hash, result, computed_at FROM portfolio_projections WHERE extra_payment = ?',
+                       (float(extra_payment),))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row and row[0] == state:
+            return {'result': json.loads(row[1]), 'computed_at': row[2], 'source': 'precomputed'}
+
+        return {'result': self.debt_manager.compare_payoff_strategies(extra_payment),
+                'computed_at': time.time(), 'source': 'live'}
+
+    def _project(self, debt: Debt, strategy: str, state_hash: str) -> dict:
+        plan = self.debt_manager.build_payment_plan(debt, strategy)
+        months = len(plan)
+        return {
+            'debt_id': debt.id,
+            'strategy': strategy,
+            'state_hash': state_hash,
+            'months': months,
+            'payoff_date': payoff_date(months),
+            'total_interest': float(plan['Interest'].sum()) if months else 0.0,
+            'total_payments': float(plan['Payment'].sum()) if months else 0.0,
+            'computed_at': time.time()
+        }
+
+    @staticmethod
+    def _portfolio_state(states: dict) -> str:
+        digest = hashlib.sha1()
+        for debt_id in sorted(states):
+            digest.update(f"{debt_id}:{states[debt_id]};".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _on_write(self, kind, debt_id):
+        with self._lock:
+            self.writes_since_run += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.is_due():
+                try:
+                    self.run_once()
+                except sqlite3.Error as e:
+                    print(f"Projection refresh failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+
+class AutopayScheduler:
+    """Posts due recurring payments on a cadence
+
+    Each tick calls DebtManager.post_due_payments(), which catches up on
+    every due date missed since the last tick, so the first tick after a
+    restart posts whatever came due while nothing was running.
+    """
+
+    def __init__(self, debt_manager: DebtManager, interval=3600.0, batch_size=5000):
+        self.debt_manager = debt_manager
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self.last_run = None
+        self.last_result = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Tick now and then every ``interval`` seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="autopay-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def tick(self, as_of: Optional[str] = None) -> dict:
+        """Post everything due on or before as_of (default today)"""
+        self.last_run = datetime.datetime.now()
+        self.last_result = self.debt_manager.post_due_payments(as_of, self.batch_size)
+        return self.last_result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except sqlite3.Error as e:
+                print(f"Autopay tick failed: {e}")
+            self._stop.wait(self.interval)
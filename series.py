@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def lttb(x, y, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling
+
+    Returns the indices of at most ``threshold`` points that preserve the
+    visual shape of the series: the first and last points are always kept,
+    and each bucket in between contributes the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    edges = np.append(edges, n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2]
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+def _money(values) -> list:
+    """Round a series to cents for a compact JSON payload"""
+    return np.round(np.asarray(values, dtype=np.float64), 2).tolist()
+
+
+def plan_series(plan, max_points=None) -> dict:
+    """Balance and cumulative payment/interest series for a payment plan
+
+    The cumulative series are single-pass prefix sums. With max_points the
+    series are downsampled together, keeping the points LTTB picks on the
+    balance curve; the totals always cover the full plan.
+    """
+    month = plan['Month'].to_numpy(dtype=np.int64)
+    balance = plan['Balance'].to_numpy(dtype=np.float64)
+    cumulative_payment = np.cumsum(plan['Payment'].to_numpy(dtype=np.float64))
+    cumulative_interest = np.cumsum(plan['Interest'].to_numpy(dtype=np.float64))
+
+    keep = lttb(month, balance, max_points) if max_points else np.arange(len(month))
+
+    return {
+        'month': month[keep].tolist(),
+        'balance': _money(balance[keep]),
+        'cumulative_payment': _money(cumulative_payment[keep]),
+        'cumulative_interest': _money(cumulative_interest[keep]),
+        'months': len(month),
+        'total_payment': round(float(cumulative_payment[-1]), 2) if len(month) else 0.0,
+        'total_interest': round(float(cumulative_interest[-1]), 2) if len(month) else 0.0
+    }
+
+
+def history_series(rollups, max_points=None) -> dict:
+    """Payment totals per period from DebtManager.get_payment_rollups() output"""
+    dates = rollups['period_start']
+    amounts = rollups['total_amount']
+
+    keep = lttb(dates.astype(np.int64), amounts, max_points) if max_points else np.arange(len(dates))
+
+    return {
+        'period_start': dates[keep].astype(str).tolist(),
+        'total_amount': _money(amounts[keep]),
+        'payment_count': rollups['payment_count'][keep].tolist(),
+        'periods': len(dates)
+    }
+
+
+def distribution_series(columns) -> dict:
+    """Balance per debt and its share of the total, from get_all_debts_columnar() output"""
+    balances = columns['current_balance']
+    total = float(balances.sum())
+    shares = balances / total * 100 if total else np.zeros(len(balances))
+
+    return {
+        'name': list(columns['name']),
+        'balance': _money(balances),
+        'share': _money(shares),
+        'total_balance': round(total, 2)
+    }
+
+
+def interest_rate_series(columns) -> dict:
+    """Debts ordered by interest rate, highest first, from get_all_debts_columnar() output"""
+    order = np.argsort(-columns['interest_rate'], kind='stable')
+
+    return {
+        'name': list(columns['name'][order]),
+        'interest_rate': columns['interest_rate'][order].tolist()
+    }
+
+
+def strategy_series(results) -> dict:
+    """Months and interest per strategy from DebtManager.compare_payoff_strategies() output"""
+    strategies = [strategy for strategy in ('avalanche', 'snowball', 'optimized') if strategy in results]
+
+    return {
+        'strategy': [strategy.title() for strategy in strategies],
+        'months': [results[strategy]['months'] for strategy in strategies],
+        'interest_paid': _money([results[strategy]['interest_paid'] for strategy in strategies]),
+        'total_paid': _money([results[strategy]['total_paid'] for strategy in strategies])
+    }
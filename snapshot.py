@@ -0,0 +1,251 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from debt_manager import DebtManager, Debt
+
+# File layout (all little-endian):
+#   header     64 bytes   magic, format version, column count, creation time
+#   directory  64 bytes per column: name, NumPy dtype string, byte offset, element count
+#   data       one fixed-width array per column, each aligned to 64 bytes
+SNAPSHOT_MAGIC = b'DMSNAP\x00\x00'
+SNAPSHOT_VERSION = 1
+HEADER_FORMAT = '<8sIId40x'
+ENTRY_FORMAT = '<40s8sQQ'
+ALIGNMENT = 64
+
+assert struct.calcsize(HEADER_FORMAT) == 64
+assert struct.calcsize(ENTRY_FORMAT) == 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_strings(values):
+    """Pack strings as an int64 offsets array plus one UTF-8 byte array"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def write_snapshot(debt_manager: DebtManager, path: str, strategies=("minimum", "accelerated")) -> dict:
+    """Write the portfolio and its payment schedules to a binary snapshot file
+
+    Schedules are stored per strategy as concatenated Payment/Interest/Balance
+    arrays with an offsets array indexed by debt position (CSR layout). The
+    file is written next to ``path`` and renamed into place, so readers never
+    see a partial snapshot.
+    """
+    start_time = time.time()
+
+    # One read snapshot for both, so a concurrent write can't misalign columns and debts
+    with debt_manager.unit_of_work():
+        columns = debt_manager.get_all_debts_columnar()
+        debts = list(debt_manager.iter_debts(order_by="id"))
+
+    name_offsets, name_bytes = _encode_strings(columns['name'])
+    arrays = {
+        'debt.id': columns['id'],
+        'debt.interest_rate': columns['interest_rate'],
+        'debt.principal': columns['principal'],
+        'debt.min_payment': columns['min_payment'],
+        'debt.total_paid': columns['total_paid'],
+        'debt.current_balance': columns['current_balance'],
+        'debt.creation_date': columns['creation_date'],
+        'debt.name_offsets': name_offsets,
+        'debt.name_bytes': name_bytes
+    }
+
+    for strategy in strategies:
+        plans = [debt_manager.build_payment_plan(debt, strategy) for debt in debts]
+        offsets = np.zeros(len(plans) + 1, dtype=np.int64)
+        np.cumsum([len(plan) for plan in plans], out=offsets[1:])
+        arrays[f'plan.{strategy}.offsets'] = offsets
+        for field in ('Payment', 'Interest', 'Balance'):
+            values = [plan[field].to_numpy(dtype=np.float64) for plan in plans]
+            arrays[f'plan.{strategy}.{field.lower()}'] = np.concatenate(values) if values else np.empty(0)
+
+    meta = {
+        'db_path': os.path.abspath(debt_manager.db_path),
+        'ledger_mode': debt_manager.ledger_mode,
+        'strategies': list(strategies),
+        'debt_count': len(debts)
+    }
+    arrays['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+    # Lay out the directory and the aligned data sections
+    entries = []
+    offset = _align(64 + 64 * len(arrays))
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        arrays[name] = array
+        entries.append((name, array, offset))
+        offset = _align(offset + array.nbytes)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(entries), time.time()))
+        for name, array, data_offset in entries:
+            f.write(struct.pack(ENTRY_FORMAT, name.encode('utf-8'), array.dtype.str.encode('ascii'),
+                                data_offset, len(array)))
+        for name, array, data_offset in entries:
+            f.seek(data_offset)
+            f.write(array.tobytes())
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Snapshot of {len(debts)} debts written to {path} in {execution_time:.4f} seconds")
+
+    return meta
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file
+
+    Columns are returned as NumPy arrays backed directly by the mapping, so
+    opening a snapshot costs a header parse and every process that maps the
+    same file shares one copy in the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, created_at = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a debt snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+
+        self.version = version
+        self.created_at = created_at
+        self._columns = {}
+        for i in range(count):
+            name, dtype, offset, length = struct.unpack_from(ENTRY_FORMAT, self._mmap, 64 + 64 * i)
+            self._columns[name.rstrip(b'\x00').decode('utf-8')] = (
+                np.dtype(dtype.rstrip(b'\x00').decode('ascii')), offset, length
+            )
+
+        self.meta = json.loads(self.column('meta').tobytes().decode('utf-8'))
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.column(name)
+
+    def __len__(self):
+        return self.meta['debt_count']
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name) -> np.ndarray:
+        """Return a zero-copy, read-only array for one column"""
+        dtype, offset, length = self._columns[name]
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=length, offset=offset)
+
+    def names(self) -> List[str]:
+        """Decode the debt names"""
+        offsets = self.column('debt.name_offsets')
+        data = self.column('debt.name_bytes').tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def position(self, debt_id: int) -> int:
+        """Position of a debt in the snapshot arrays, or -1 if it is not present"""
+        ids = self.column('debt.id')
+        position = int(np.searchsorted(ids, debt_id))
+        return position if position < len(ids) and ids[position] == debt_id else -1
+
+    def debts(self) -> List[Debt]:
+        """Rebuild Debt objects for callers that still need them"""
+        dates = self.column('debt.creation_date').astype(str)
+        return [
+            Debt(id=int(debt_id), name=name, principal=float(principal), interest_rate=float(rate),
+                 min_payment=float(min_payment), total_paid=float(paid), creation_date=str(date))
+            for debt_id, name, principal, rate, min_payment, paid, date in zip(
+                self.column('debt.id'), self.names(), self.column('debt.principal'),
+                self.column('debt.interest_rate'), self.column('debt.min_payment'),
+                self.column('debt.total_paid'), dates)
+        ]
+
+    def debt(self, position: int) -> Debt:
+        """Rebuild the Debt at one position without decoding the other names"""
+        offsets = self.column('debt.name_offsets')
+        name = self.column('debt.name_bytes')[offsets[position]:offsets[position + 1]].tobytes().decode('utf-8')
+        return Debt(id=int(self.column('debt.id')[position]), name=name,
+                    principal=float(self.column('debt.principal')[position]),
+                    interest_rate=float(self.column('debt.interest_rate')[position]),
+                    min_payment=float(self.column('debt.min_payment')[position]),
+                    total_paid=float(self.column('debt.total_paid')[position]),
+                    creation_date=str(self.column('debt.creation_date')[position]))
+
+    def schedule(self, debt_id: int, strategy="minimum") -> pd.DataFrame:
+        """Return the stored payment plan for one debt in generate_payment_plan's shape"""
+        position = self.position(debt_id)
+        if position < 0 or f'plan.{strategy}.offsets' not in self._columns:
+            return pd.DataFrame()
+
+        offsets = self.column(f'plan.{strategy}.offsets')
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        return pd.DataFrame({
+            'Month': np.arange(1, end - start + 1),
+            'Payment': self.column(f'plan.{strategy}.payment')[start:end],
+            'Interest': self.column(f'plan.{strategy}.interest')[start:end],
+            'Balance': self.column(f'plan.{strategy}.balance')[start:end]
+        })
+
+    def schedule_lengths(self, strategy="minimum") -> np.ndarray:
+        """Months to payoff for every debt, in snapshot order"""
+        return np.diff(self.column(f'plan.{strategy}.offsets'))
+
+    def close(self):
+        """Release the mapping; arrays still referenced elsewhere keep it alive"""
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Outstanding array views pin the mapping; it is freed with them
+            pass
+        self._file.close()
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """Open a snapshot file for zero-copy reads"""
+    start_time = time.time()
+
+    snapshot = Snapshot(path)
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Snapshot of {len(snapshot)} debts loaded in {execution_time:.4f} seconds")
+
+    return snapshot
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "debt_management.db"
+    out_path = sys.argv[2] if len(sys.argv) > 2 else "portfolio.snap"
+    write_snapshot(DebtManager(db_path), out_path)
@@ -0,0 +1,226 @@
+import collections
+import contextvars
+import re
+import sqlite3
+import sys
+import time
+from typing import Optional
+
+# Trace collecting statements for the current request, if any
+_current_trace = contextvars.ContextVar('sql_trace', default=None)
+
+
+def _normalize(sql: str) -> str:
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def _jsonable(params):
+    """Parameters as stored on a trace entry; BLOBs and other values are shown by type"""
+    def value(item):
+        return item if isinstance(item, (int, float, str, type(None))) else f"<{type(item).__name__}>"
+    if isinstance(params, dict):
+        return {key: value(item) for key, item in params.items()}
+    return [value(item) for item in params] if params else []
+
+
+def _caller() -> str:
+    """First frame outside this module and the sqlite3 package"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get('__name__') in (__name__, 'sqlite3', 'contextlib'):
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class SQLTrace:
+    """Statements executed while one request (or block) was being served
+
+    Each entry records the SQL, its parameters, the calling function, the
+    time spent executing and fetching, and the rows returned or changed.
+    """
+
+    def __init__(self, slow_ms=50.0, explain=False, n_plus_one_threshold=5):
+        self.slow_ms = slow_ms
+        self.explain_slow = explain
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements = []
+        self.connections = 0
+        self.started = time.time()
+
+    def record(self, sql, params, caller) -> dict:
+        entry = {'sql': _normalize(sql), 'params': _jsonable(params), 'caller': caller,
+                 'duration_ms': 0.0, 'rows': 0}
+        self.statements.append(entry)
+        return entry
+
+    def explain(self, conn, entry, params):
+        """Attach EXPLAIN QUERY PLAN output to a slow SELECT"""
+        if not self.explain_slow or entry['duration_ms'] < self.slow_ms or 'plan' in entry:
+            return
+        if not entry['sql'].upper().startswith(('SELECT', 'WITH')):
+            return
+        try:
+            rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + entry['sql'], params)
+            entry['plan'] = [row[3] for row in rows.fetchall()]
+        except sqlite3.Error as e:
+            entry['plan'] = [f"unavailable: {e}"]
+
+    def summary(self) -> dict:
+        """Totals plus repeated-query and N+1 findings"""
+        by_sql = collections.defaultdict(list)
+        for entry in self.statements:
+            by_sql[entry['sql']].append(entry)
+
+        repeated = []
+        n_plus_one = []
+        for sql, entries in by_sql.items():
+            identical = collections.Counter(repr(entry['params']) for entry in entries)
+            duplicates = sum(count for count in identical.values() if count > 1)
+            if duplicates:
+                repeated.append({'sql': sql, 'count': duplicates,
+                                 'callers': sorted({entry['caller'] for entry in entries})})
+            # The same statement run many times with different parameters is
+            # usually a loop that issues one query per item
+            if len(identical) >= self.n_plus_one_threshold:
+                n_plus_one.append({'sql': sql, 'count': len(entries),
+                                   'callers': sorted({entry['caller'] for entry in entries})})
+
+        return {
+            'queries': len(self.statements),
+            'connections': self.connections,
+            'duration_ms': round(sum(entry['duration_ms'] for entry in self.statements), 3),
+            'rows': sum(entry['rows'] for entry in self.statements),
+            'repeated': repeated,
+            'n_plus_one': n_plus_one,
+            'slow': [{**entry, 'duration_ms': round(entry['duration_ms'], 3)}
+                     for entry in self.statements if entry['duration_ms'] >= self.slow_ms]
+        }
+
+
+class TraceCursor(sqlite3.Cursor):
+    """Cursor that reports statements and fetched rows to the active trace"""
+
+    _entry = None
+
+    def execute(self, sql, parameters=()):
+        trace = _current_trace.get()
+        if trace is None:
+            self._entry = None
+            return super().execute(sql, parameters)
+
+        self._entry = trace.record(sql, parameters, _caller())
+        start_time = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._finish(start_time, trace, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        trace = _current_trace.get()
+        if trace is None:
+            self._entry = None
+            return super().executemany(sql, seq_of_parameters)
+
+        self._entry = trace.record(sql, (), _caller())
+        start_time = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._finish(start_time, trace, None)
+
+    def _finish(self, start_time, trace, parameters):
+        entry = self._entry
+        entry['duration_ms'] += (time.perf_counter() - start_time) * 1000
+        if self.rowcount > 0:
+            entry['rows'] = self.rowcount
+        if parameters is not None:
+            trace.explain(self.connection, entry, parameters)
+
+    def _fetched(self, start_time, count):
+        if self._entry is not None:
+            self._entry['duration_ms'] += (time.perf_counter() - start_time) * 1000
+            self._entry['rows'] += count
+
+    def fetchone(self):
+        if self._entry is None:
+            return super().fetchone()
+        start_time = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start_time, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        if self._entry is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        start_time = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start_time, len(rows))
+        return rows
+
+    def fetchall(self):
+        if self._entry is None:
+            return super().fetchall()
+        start_time = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start_time, len(rows))
+        return rows
+
+    def __next__(self):
+        if self._entry is None:
+            return super().__next__()
+        start_time = time.perf_counter()
+        row = super().__next__()
+        self._fetched(start_time, 1)
+        return row
+
+
+class TraceConnection(sqlite3.Connection):
+    """Connection factory whose cursors report to the active trace
+
+    Pass as ``sqlite3.connect(path, factory=TraceConnection)``. Outside a
+    trace it hands out plain cursors, so it behaves like a plain connection
+    apart from one context lookup per cursor; a cursor created outside a
+    trace is not traced.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.connections += 1
+
+    def cursor(self, factory=None):
+        if factory is None:
+            # Rows from a plain cursor are fetched without a Python call each
+            factory = TraceCursor if _current_trace.get() is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(database, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect with statement tracing"""
+    return sqlite3.connect(database, factory=TraceConnection, **kwargs)
+
+
+def start_trace(slow_ms=50.0, explain=False, n_plus_one_threshold=5) -> SQLTrace:
+    """Begin collecting statements in the current context"""
+    trace = SQLTrace(slow_ms, explain, n_plus_one_threshold)
+    trace._token = _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[SQLTrace]:
+    """Trace active in the current context, if any"""
+    return _current_trace.get()
+
+
+def stop_trace(trace: SQLTrace) -> SQLTrace:
+    """Stop collecting statements for a trace returned by start_trace()"""
+    _current_trace.reset(trace._token)
+    return trace
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from accrual import DAY_COUNT_CONVENTIONS, accrue, year_fraction
+from debt_manager import DebtManager, Debt, Payment
+
+
+def test_simple_interest_is_not_capitalized_at_observations():
+    alone = accrue([1000.0], [20.0], ['2024-01-01'], [0], ['2024-12-31'], [0.0], 'actual/365', 'simple')
+    together = accrue([1000.0], [20.0], ['2024-01-01'], [0, 0], ['2024-06-30', '2024-12-31'], [0.0, 0.0],
+                      'actual/365', 'simple')
+
+    assert alone[0] == pytest.approx(1200.0)
+    assert together[1] == pytest.approx(alone[0])
+
+
+def test_simple_interest_is_capitalized_at_payments():
+    balances = accrue([1000.0], [20.0], ['2024-01-01'], [0, 0], ['2024-07-02', '2024-12-31'], [100.0, 0.0],
+                      'actual/365', 'simple')
+
+    after_payment = 1000.0 * (1 + 0.2 * 183 / 365) - 100.0
+    assert balances[0] == pytest.approx(after_payment)
+    assert balances[1] == pytest.approx(after_payment * (1 + 0.2 * 182 / 365))
+
+
+@pytest.mark.parametrize("convention", DAY_COUNT_CONVENTIONS)
+def test_observations_do_not_change_daily_compounding(convention):
+    dates = ['2024-01-31', '2024-02-29', '2024-03-31', '2024-12-31']
+    observed = accrue([1000.0] * 4, [12.0] * 4, ['2024-01-15'] * 4, [0, 0, 0, 0], dates, [0.0] * 4, convention)
+    chained = accrue([1000.0], [12.0], ['2024-01-15'], [0, 0, 0, 0], dates, [0.0] * 4, convention)
+
+    np.testing.assert_allclose(chained, observed)
+
+
+def test_actual_actual_splits_leap_and_common_days():
+    start = np.array(['2023-07-01'], dtype='datetime64[D]')
+    end = np.array(['2024-07-01'], dtype='datetime64[D]')
+
+    assert year_fraction(start, end, 'actual/actual')[0] == pytest.approx(184 / 365 + 182 / 366)
+
+
+def test_archived_payments_still_count(tmp_path):
+    manager = DebtManager(str(tmp_path / "accrual.db"))
+    manager.add_debt(Debt(id=None, name="Loan", principal=900.0, interest_rate=0.0, min_payment=50.0,
+                          creation_date="2024-01-01"))
+    manager.add_payment(Payment(id=None, debt_id=1, amount=300.0, payment_date="2024-05-01"))
+    manager.archive(payments_before="2025-01-01")
+
+    balances = manager.accrue_balances(as_of="2025-06-01")
+    assert balances['accrued_balance'].iloc[0] == pytest.approx(600.0)
+    assert balances['drift'].iloc[0] == pytest.approx(0.0)
+
+    statements = pd.DataFrame({'debt_id': [1], 'date': ['2025-06-01'], 'balance': [600.0]})
+    assert manager.reconcile_statements(statements)['difference'].iloc[0] == pytest.approx(0.0)
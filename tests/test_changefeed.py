@@ -0,0 +1,25 @@
+import sqlite3
+import time
+
+from changefeed import ChangeFeed
+from debt_manager import DebtManager, Debt
+
+
+def test_log_is_pruned_without_subscribers(tmp_path):
+    manager = DebtManager(str(tmp_path / "feed.db"))
+    feed = ChangeFeed(lambda: sqlite3.connect(manager.db_path), dict, dict, dict, dict, poll_interval=0.01, retain=5)
+    feed.start()
+    try:
+        for i in range(20):
+            manager.add_debt(Debt(id=None, name=f"Debt {i}", principal=100.0, interest_rate=5.0, min_payment=10.0))
+
+        deadline = time.time() + 5
+        while feed.seq < 20 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        feed.close()
+
+    conn = sqlite3.connect(manager.db_path)
+    oldest, latest = conn.execute('SELECT MIN(seq), MAX(seq) FROM changes').fetchone()
+    assert latest == 20 and latest - oldest < 2 * feed.retain
+    conn.close()
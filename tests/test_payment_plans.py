@@ -0,0 +1,107 @@
+import datetime
+import sqlite3
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+import debt_manager
+from debt_manager import DebtManager, Debt, Payment
+
+
+@pytest.fixture(params=["float", "cents"])
+def manager(request, tmp_path):
+    manager = DebtManager(str(tmp_path / "plans.db"), ledger_mode=request.param)
+    manager.add_debt(Debt(id=None, name="Card", principal=5000.0, interest_rate=18.5, min_payment=150.0))
+    return manager
+
+
+def full_recompute(manager, debt_id, strategy="minimum"):
+    manager._plan_cache.clear()
+    return manager.build_payment_plan(manager.get_debt(debt_id), strategy)
+
+
+def stored_plan(manager, debt_id, strategy="minimum"):
+    manager._plan_cache.clear()
+    return manager.scheduled_payment_plan(manager.get_debt(debt_id), strategy)
+
+
+def months_from_today(months):
+    return (datetime.date.today() + relativedelta(months=months)).strftime("%Y-%m-%d")
+
+
+def stored_state(manager, debt_id):
+    conn = sqlite3.connect(manager.db_path)
+    row = conn.execute('SELECT state FROM payment_schedules WHERE debt_id = ?', (debt_id,)).fetchone()
+    conn.close()
+    return row
+
+
+@pytest.mark.parametrize("strategy", ["minimum", "accelerated"])
+def test_first_plan_equals_full_recompute(manager, strategy):
+    assert stored_plan(manager, 1, strategy).equals(full_recompute(manager, 1, strategy))
+
+
+@pytest.mark.parametrize("months", [0, 3, -14])
+def test_plan_after_payment_equals_full_recompute(manager, months):
+    stored_plan(manager, 1)
+    manager.add_payment(Payment(id=None, debt_id=1, amount=412.37, payment_date=months_from_today(months)))
+
+    assert stored_plan(manager, 1).equals(full_recompute(manager, 1))
+
+
+def test_plan_after_many_payments_equals_full_recompute(manager):
+    for months in (0, 1, 1, 5, -2, 30):
+        manager.add_payment(Payment(id=None, debt_id=1, amount=99.99, payment_date=months_from_today(months)))
+        assert stored_plan(manager, 1).equals(full_recompute(manager, 1))
+
+
+def test_idle_elapsed_months_leave_plan_unchanged(manager, monkeypatch):
+    plan = stored_plan(manager, 1)
+
+    class Later(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.datetime.now(tz) + relativedelta(months=3)
+
+    monkeypatch.setattr(debt_manager.datetime, "datetime", Later)
+
+    later = stored_plan(manager, 1)
+    assert later.equals(full_recompute(manager, 1))
+    assert later.equals(plan)
+
+
+def test_unchanged_debt_reuses_stored_schedule(manager, capsys):
+    stored_plan(manager, 1)
+    capsys.readouterr()
+
+    stored_plan(manager, 1)
+    assert "Scheduled plan reused" in capsys.readouterr().out
+
+
+def test_changed_terms_rebuild_schedule(manager):
+    stored_plan(manager, 1)
+    debt = manager.get_debt(1)
+    debt.interest_rate = 9.0
+    manager.update_debt(debt)
+
+    assert stored_plan(manager, 1).equals(full_recompute(manager, 1))
+
+
+def test_read_only_unit_of_work_does_not_write_schedules(manager):
+    with manager.unit_of_work():
+        plan = stored_plan(manager, 1)
+
+    assert stored_state(manager, 1) is None
+    assert plan.equals(full_recompute(manager, 1))
+
+
+def test_caches_keep_only_recent_entries(manager):
+    manager._comparison_cache.maxsize = 2
+    for extra in (10.0, 20.0, 30.0):
+        manager.compare_payoff_strategies(extra_payment=extra)
+    assert len(manager._comparison_cache) == 2
+
+    manager._plan_cache.maxsize = 1
+    for strategy in ("minimum", "accelerated"):
+        manager.build_payment_plan(manager.get_debt(1), strategy)
+    assert manager._plan_cache.keys() == [(1, "accelerated")]
@@ -0,0 +1,45 @@
+import csv
+
+import pytest
+
+from debt_manager import DebtManager, Debt, Payment
+from reports import generate_reports
+
+
+def test_statements_as_of_leave_out_later_payments(tmp_path):
+    manager = DebtManager(str(tmp_path / "reports.db"))
+    manager.add_debt(Debt(id=None, name="Loan", principal=1000.0, interest_rate=12.0, min_payment=50.0,
+                          creation_date="2024-01-01"))
+    for date in ("2024-02-01", "2024-03-01", "2024-04-01"):
+        manager.add_payment(Payment(id=None, debt_id=1, amount=100.0, payment_date=date))
+
+    generate_reports(manager, str(tmp_path / "then"), workers=1, charts=False, as_of="2024-03-15")
+    generate_reports(manager, str(tmp_path / "now"), workers=1, charts=False)
+
+    with open(tmp_path / "then" / "summary.csv") as f:
+        then = next(csv.DictReader(f))
+    with open(tmp_path / "now" / "summary.csv") as f:
+        now = next(csv.DictReader(f))
+    assert float(then['Balance']) == pytest.approx(800.0)
+    assert float(then['Total Paid']) == pytest.approx(200.0)
+    assert then['Payments'] == '2'
+    assert int(then['Months to Payoff']) > int(now['Months to Payoff'])
+    assert "2024-04-01" not in (tmp_path / "then" / "debt_1" / "statement.html").read_text()
+
+
+def test_filters_select_debts_as_of(tmp_path):
+    manager = DebtManager(str(tmp_path / "reports.db"))
+    manager.add_debt(Debt(id=None, name="Loan", principal=200.0, interest_rate=12.0, min_payment=50.0,
+                          creation_date="2024-01-01"))
+    manager.add_debt(Debt(id=None, name="Later", principal=500.0, interest_rate=12.0, min_payment=50.0,
+                          creation_date="2024-06-01"))
+    manager.add_payment(Payment(id=None, debt_id=1, amount=200.0, payment_date="2024-04-01"))
+
+    # Paid off now, but still owed on as_of; the second debt did not exist yet
+    generate_reports(manager, str(tmp_path / "then"), workers=1, charts=False, as_of="2024-03-15",
+                     paid_off=False)
+
+    with open(tmp_path / "then" / "summary.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row['Name'] for row in rows] == ["Loan"]
+    assert float(rows[0]['Balance']) == pytest.approx(200.0)
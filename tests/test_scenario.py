@@ -0,0 +1,19 @@
+from debt_manager import DebtManager, Debt
+from scenario import ScenarioBase
+
+
+def test_fork_copies_on_write_on_both_sides(tmp_path):
+    manager = DebtManager(str(tmp_path / "scenario.db"))
+    manager.add_debt(Debt(id=None, name="Card", principal=5000.0, interest_rate=18.0, min_payment=100.0))
+    parent = ScenarioBase(manager).scenario()
+
+    parent.add_payment(1, 1000.0)
+    child = parent.fork("child")
+    parent.add_payment(1, 1000.0)
+    grandchild = child.fork("grandchild")
+    child.add_payment(1, 500.0)
+
+    assert parent.get_debt(1).current_balance == 3000.0
+    assert child.get_debt(1).current_balance == 3500.0
+    assert grandchild.get_debt(1).current_balance == 4000.0
+    assert manager.get_debt(1).current_balance == 5000.0
@@ -0,0 +1,32 @@
+import pytest
+
+from debt_manager import DebtManager, Debt
+
+
+@pytest.fixture(params=["float", "cents"])
+def manager(request, tmp_path):
+    manager = DebtManager(str(tmp_path / "strategies.db"), ledger_mode=request.param)
+    for name, principal, rate, min_payment in (("Card", 4000.0, 22.9, 120.0), ("Car", 9000.0, 6.5, 210.0),
+                                                ("Store", 800.0, 27.0, 35.0)):
+        manager.add_debt(Debt(id=None, name=name, principal=principal, interest_rate=rate, min_payment=min_payment))
+    return manager
+
+
+def test_strategies_share_one_engine(manager):
+    result = manager.compare_payoff_strategies(extra_payment=200)
+
+    # Distinct rates: the optimized allocation is avalanche
+    assert result['optimized']['interest_paid'] == result['avalanche']['interest_paid']
+    assert result['optimized']['months'] == result['avalanche']['months']
+    assert result['optimized']['interest_saved_vs_avalanche'] == 0
+    assert result['optimized']['interest_saved_vs_snowball'] == pytest.approx(
+        result['snowball']['interest_paid'] - result['avalanche']['interest_paid'])
+    assert result['avalanche']['interest_paid'] <= result['snowball']['interest_paid']
+
+
+def test_lump_sums_apply_to_every_strategy(manager):
+    plain = manager.compare_payoff_strategies(extra_payment=200)
+    lump = manager.compare_payoff_strategies(extra_payment=200, lump_sums={3: 2000.0})
+
+    for strategy in ("avalanche", "snowball", "optimized"):
+        assert lump[strategy]['interest_paid'] < plain[strategy]['interest_paid']
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from debt_manager import DebtManager, Debt, Payment
+
+
+def test_queued_replay_finds_archived_payment(tmp_path):
+    manager = DebtManager(str(tmp_path / "queue.db"), use_write_queue=True, ledger_mode="cents")
+    manager.add_debt(Debt(id=None, name="Card", principal=1000.0, interest_rate=0.0, min_payment=50.0))
+    payment_id = manager.add_payment(Payment(id=None, debt_id=1, amount=100.1, payment_date="2024-01-01",
+                                             idempotency_key="retry"))
+    manager.archive(payments_before="2025-01-01")
+
+    replayed = manager.add_payment(Payment(id=None, debt_id=1, amount=100.1, payment_date="2024-01-01",
+                                           idempotency_key="retry"))
+    manager.close()
+
+    assert replayed == payment_id
+    conn = sqlite3.connect(manager.db_path)
+    assert conn.execute('SELECT total_paid, total_paid_cents FROM debts').fetchone() == (100.1, 10010)
+    conn.close()
+
+
+def test_writer_survives_a_failed_operation(tmp_path):
+    manager = DebtManager(str(tmp_path / "queue.db"), use_write_queue=True)
+    manager.add_debt(Debt(id=None, name="Card", principal=1000.0, interest_rate=0.0, min_payment=50.0))
+
+    broken = manager.write_queue.submit_payment(None)
+    with pytest.raises(AttributeError):
+        broken.result(timeout=5)
+
+    assert manager.add_payment_async(Payment(id=None, debt_id=1, amount=25.0)).result(timeout=5) > 0
+    manager.close()
+    assert manager.get_debt(1).total_paid == 25.0
@@ -1,21 +1,148 @@
 import os
 import base64
+import csv
+import itertools
 import io
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-from debt_manager import DebtManager, Debt, Payment
+import sqlite3
+from dataclasses import asdict
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context, g
+from debt_manager import DebtManager, Debt, Payment, RecurringPayment, DEBT_ORDERINGS
+from jobs import JobQueue, portfolio_fingerprint
+from scheduler import ProjectionScheduler, AutopayScheduler
+from scenario import ScenarioBase, compare_scenarios
+from profiling import RequestProfiler, RequestSQLTracer
+from assets import AssetPipeline, ResponseCompressor
+from changefeed import ChangeFeed
+from series import lttb, plan_series, history_series, distribution_series, interest_rate_series, strategy_series
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from datetime import datetime
 import json
+import time
+import uuid
 import numpy as np
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'your_very_secret_key_here'  # Change this in production
 
-# Initialize DebtManager
-debt_manager = DebtManager()
+# Initialize DebtManager (set DEBT_WRITE_QUEUE=1 to group-commit payments,
+# DEBT_LEDGER_MODE=cents for the integer-cents ledger)
+debt_manager = DebtManager(use_write_queue=os.environ.get('DEBT_WRITE_QUEUE') == '1',
+                           ledger_mode=os.environ.get('DEBT_LEDGER_MODE', 'float'))
+
+# Charts are rendered in the browser from the /api/series endpoints; server-side
+# PNGs are a fallback that DEBT_SERVER_CHARTS=0 turns off
+SERVER_CHARTS = os.environ.get('DEBT_SERVER_CHARTS', '1') != '0'
+
+# Opt-in request profiling (DEBT_PROFILING=1); profile a request by sending
+# X-Profile: 1 or sample with DEBT_PROFILE_SAMPLE_RATE, summaries at /admin/profiles
+profiler = RequestProfiler.from_env()
+if profiler is not None:
+    profiler.init_app(app)
+
+# Opt-in SQL tracing (DEBT_SQL_TRACE=1): per-request query counts, repeated and
+# N+1 queries, and EXPLAIN QUERY PLAN for slow statements (DEBT_SQL_EXPLAIN=1)
+sql_tracer = RequestSQLTracer.from_env()
+if sql_tracer is not None:
+    sql_tracer.init_app(app)
+
+# gzip/brotli compression of responses of DEBT_COMPRESS_MIN_SIZE bytes or more
+# (1024 by default, DEBT_COMPRESSION=0 turns it off)
+compressor = ResponseCompressor.from_env()
+if compressor is not None:
+    compressor.init_app(app)
+
+# The single-page frontend: minified, fingerprinted and precompressed once at
+# startup, served from /assets with an immutable Cache-Control. Served from
+# /app it talks to this server, so its API base is the same origin
+ROOT = os.path.dirname(os.path.abspath(__file__))
+assets = AssetPipeline.from_env({
+    'frontend.js': os.path.join(ROOT, 'frontend.js'),
+    'frontend.html': os.path.join(ROOT, 'frontend.html')
+}, page_globals={'DEBT_API_BASE': ''})
+assets.init_app(app)
+
+@app.route('/app')
+def frontend():
+    """The single-page frontend, whose scripts are served from /assets"""
+    return assets.serve_page('frontend.html')
+
+def debt_change_record(debt):
+    """A debt as the frontend keeps it, with its derived balance and interest"""
+    record = asdict(debt)
+    record['current_balance'] = round(debt.current_balance, 2)
+    record['monthly_interest'] = round(debt.monthly_interest, 2)
+    return record
+
+def change_snapshot():
+    """Full state for a client starting the change feed"""
+    return {
+        'debts': [debt_change_record(debt) for debt in debt_manager.iter_debts(order_by="id")],
+        'payments': [asdict(payment) for payment in itertools.islice(
+            debt_manager.iter_payments(order_by="payment_date", descending=True), RECENT_PAYMENTS)],
+        'totals': debt_manager.get_portfolio_totals()
+    }
+
+# Live updates: one broadcaster turns the database change log into server-sent
+# events for every /api/changes client (DEBT_CHANGE_POLL seconds between checks
+# for writes from other processes; writes from this one are pushed at once)
+change_feed = ChangeFeed(
+    lambda: sqlite3.connect(debt_manager.db_path),
+    lambda ids: {debt.id: debt_change_record(debt) for debt in debt_manager.get_debts_by_id(ids)},
+    lambda ids: {payment.id: asdict(payment) for payment in debt_manager.get_payments_by_id(ids)},
+    debt_manager.get_portfolio_totals,
+    change_snapshot,
+    poll_interval=float(os.environ.get('DEBT_CHANGE_POLL', '0.5'))
+)
+debt_manager.add_write_listener(change_feed.notify)
+change_feed.start()
+
+@app.route('/api/changes')
+def change_stream():
+    """Server-sent events with debt and payment changes as they commit"""
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    return Response(change_feed.stream(last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# POST endpoints that only compute from their request body and never write
+READ_ONLY_POSTS = {'scenario_comparison'}
+
+@app.before_request
+def open_unit_of_work():
+    """Serve each request from one database snapshot, loading each debt once"""
+    # Write requests take the write lock up front so their snapshot cannot go
+    # stale before they write; with the write queue the writer thread needs it
+    if request.method == 'POST' and debt_manager.write_queue is None and request.endpoint not in READ_ONLY_POSTS:
+        scope = debt_manager.transaction()
+        g.debt_writes = True
+    else:
+        scope = debt_manager.unit_of_work()
+    scope.__enter__()
+    g.debt_scope = scope
+
+@app.after_request
+def commit_unit_of_work(response):
+    """Commit a write request before its response is sent, so a failed commit fails the request"""
+    if g.get('debt_writes') and 'debt_scope' in g:
+        scope = g.pop('debt_scope')
+        try:
+            scope.__exit__(None, None, None)
+        except Exception:
+            # The write was rolled back; don't show its success message on the next page
+            session.pop('_flashes', None)
+            raise
+    return response
+
+@app.teardown_request
+def close_unit_of_work(exc):
+    scope = g.pop('debt_scope', None)
+    if scope is not None:
+        if exc is None:
+            scope.__exit__(None, None, None)
+        else:
+            scope.__exit__(type(exc), exc, exc.__traceback__)
 
 @app.route('/')
 def index():
@@ -23,8 +150,9 @@ def index():
     debts = debt_manager.get_all_debts()
     
     # Calculate totals
-    total_balance = sum(debt.current_balance for debt in debts)
-    total_min_payment = sum(debt.min_payment for debt in debts)
+    totals = debt_manager.get_portfolio_totals()
+    total_balance = totals['total_balance']
+    total_min_payment = totals['total_min_payment']
     total_interest_paid = sum(debt.principal * (debt.interest_rate / 100) * (debt.total_paid / debt.principal) 
                               if debt.principal > 0 else 0 
                               for debt in debts)
@@ -41,11 +169,73 @@ def index():
                           highest_interest=highest_interest[:3] if highest_interest else [],
                           highest_balance=highest_balance[:3] if highest_balance else [])
 
+# Query-string filters accepted by the debt search, with their parsers
+SEARCH_FILTERS = {
+    'min_balance': float,
+    'max_balance': float,
+    'min_rate': float,
+    'max_rate': float,
+    'created_after': str,
+    'created_before': str,
+    'paid_off': lambda value: value.lower() in ('1', 'true', 'yes'),
+    'limit': int,
+    'offset': int
+}
+
+def search_params(args):
+    """Parse search filters from request args; raises ValueError on bad input"""
+    params = {'text': args.get('q') or None}
+    for name, parse in SEARCH_FILTERS.items():
+        if args.get(name):
+            params[name] = parse(args[name])
+    # SQLite reads a negative LIMIT as no limit at all
+    params['limit'] = max(1, min(params.get('limit', 50), 500))
+    params['offset'] = max(0, params.get('offset', 0))
+    return params
+
 @app.route('/debts')
 def view_all_debts():
-    """View all debts page"""
-    debts = debt_manager.get_all_debts()
-    return render_template('debts.html', debts=debts)
+    """View all debts page, filtered when search parameters are given"""
+    if not any(name in request.args for name in ('q', *SEARCH_FILTERS)):
+        # Paid-off debts moved out by the archival job are listed on request
+        include_archived = request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+        debts = debt_manager.get_all_debts(include_archived=include_archived)
+        return render_template('debts.html', debts=debts)
+    
+    try:
+        params = search_params(request.args)
+    except ValueError:
+        flash('Invalid search filter', 'danger')
+        return redirect(url_for('view_all_debts'))
+    
+    debts = debt_manager.search_debts(**params)
+    return render_template('debts.html', debts=debts, search=request.args)
+
+@app.route('/api/debts/search')
+def search_debts():
+    """Search debts by name and range filters, as JSON"""
+    try:
+        params = search_params(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid search filter: {e}'}), 400
+    
+    start_time = time.time()
+    debts = debt_manager.search_debts(**params)
+    
+    return jsonify({
+        'debts': [{
+            'id': debt.id,
+            'name': debt.name,
+            'balance': debt.current_balance,
+            'interest_rate': debt.interest_rate,
+            'min_payment': debt.min_payment,
+            'creation_date': debt.creation_date
+        } for debt in debts],
+        'count': len(debts),
+        'limit': params['limit'],
+        'offset': params.get('offset', 0),
+        'elapsed_ms': round((time.time() - start_time) * 1000, 2)
+    })
 
 @app.route('/debt/add', methods=['GET', 'POST'])
 def add_debt():
@@ -89,28 +279,43 @@ def add_debt():
 
 @app.route('/debt/<int:debt_id>')
 def view_debt(debt_id):
-    """View details of a specific debt"""
+    """View details of a specific debt, including archived ones"""
     debt = debt_manager.get_debt(debt_id)
+    archived = False
+    if not debt:
+        debt = debt_manager.get_debt(debt_id, include_archived=True)
+        archived = debt is not None
     
     if not debt:
         flash(f'Debt with ID {debt_id} not found', 'danger')
         return redirect(url_for('view_all_debts'))
     
-    payments = debt_manager.get_payments_for_debt(debt_id)
+    # History comes from the monthly or weekly rollups; only the most recent
+    # payments are loaded individually
+    period = request.args.get('period', 'month')
+    if period not in ('month', 'week'):
+        period = 'month'
+    rollups = debt_manager.get_payment_rollups(debt_id, period)
+    payments = list(itertools.islice(
+        debt_manager.iter_payments(debt_id=debt_id, order_by="payment_date", descending=True,
+                                   include_archived=archived), RECENT_PAYMENTS))
     
     # Generate payment chart
     payment_chart = None
-    if payments:
-        payment_chart = generate_payment_history_chart(payments)
+    if SERVER_CHARTS and len(rollups['period_start']):
+        payment_chart = generate_payment_history_chart(rollups)
     
     # Calculate statistics
-    total_paid = sum(payment.amount for payment in payments)
+    total_paid = float(rollups['total_amount'].sum())
     interest_paid = total_paid - (debt.principal - debt.current_balance)
     percent_paid = (debt.total_paid / debt.principal) * 100 if debt.principal > 0 else 0
     
     return render_template('view_debt.html', 
                           debt=debt, 
                           payments=payments,
+                          rollups=rollups,
+                          period=period,
+                          payment_count=int(rollups['payment_count'].sum()),
                           payment_chart=payment_chart,
                           interest_paid=interest_paid,
                           percent_paid=percent_paid)
@@ -190,11 +395,14 @@ def add_payment(debt_id):
                 flash('Payment amount must be greater than zero', 'danger')
                 return redirect(url_for('add_payment', debt_id=debt_id))
             
-            # Create payment
+            # Create payment; a resubmitted form or a retried API call carries
+            # the same idempotency key and is not applied twice
             payment = Payment(id=None, 
                              debt_id=debt_id, 
                              amount=amount, 
-                             payment_date=payment_date)
+                             payment_date=payment_date,
+                             idempotency_key=request.headers.get('Idempotency-Key')
+                                             or request.form.get('idempotency_key') or None)
             
             payment_id = debt_manager.add_payment(payment)
             
@@ -206,7 +414,7 @@ def add_payment(debt_id):
             return redirect(url_for('add_payment', debt_id=debt_id))
     
     today = datetime.now().strftime('%Y-%m-%d')
-    return render_template('add_payment.html', debt=debt, today=today)
+    return render_template('add_payment.html', debt=debt, today=today, idempotency_key=uuid.uuid4().hex)
 
 @app.route('/debt/<int:debt_id>/plan')
 def payment_plan(debt_id):
@@ -220,31 +428,24 @@ def payment_plan(debt_id):
     # Get strategy from query parameters, default to "minimum"
     strategy = request.args.get('strategy', 'minimum')
     
-    # Generate payment plan
-    plan_df = debt_manager.generate_payment_plan(debt_id, strategy)
+    # Generate payment plan, summary statistics and chart
+    plan, job = run_job('payment_plan', debt_id=debt_id, strategy=strategy)
     
-    if plan_df.empty:
+    if plan is None:
+        return job_response(job)
+    
+    if not plan:
         flash('Unable to generate payment plan', 'danger')
         return redirect(url_for('view_debt', debt_id=debt_id))
     
-    # Calculate summary statistics
-    months_to_payoff = len(plan_df)
-    total_interest = sum(plan_df['Interest'])
-    total_payments = sum(plan_df['Payment'])
-    
-    # Generate visualization
-    plan_chart = generate_payment_plan_chart(plan_df, debt.name)
-    
-    # Convert plan to HTML table (limited to first 24 months for display)
-    plan_table = plan_df.head(24).to_html(classes='table table-dark table-hover', index=False)
-    
     return render_template('payment_plan.html', 
                           debt=debt,
-                          plan_chart=plan_chart,
-                          plan_table=plan_table,
-                          months_to_payoff=months_to_payoff,
-                          total_interest=total_interest,
-                          total_payments=total_payments,
+                          plan_chart=plan['plan_chart'],
+                          plan_series=plan['plan_series'],
+                          plan_table=plan['plan_table'],
+                          months_to_payoff=plan['months_to_payoff'],
+                          total_interest=plan['total_interest'],
+                          total_payments=plan['total_payments'],
                           strategy=strategy)
 
 @app.route('/strategies')
@@ -257,19 +458,21 @@ def strategy_comparison():
     except ValueError:
         extra_payment = 0
     
-    # Get comparison results
-    results = debt_manager.compare_payoff_strategies(extra_payment)
+    # Get comparison results and chart
+    comparison, job = run_job('strategies', extra_payment=extra_payment)
     
-    if not results:
+    if comparison is None:
+        return job_response(job)
+    
+    if not comparison:
         flash('No debts found for comparison', 'danger')
         return redirect(url_for('index'))
     
-    # Generate visualization
-    comparison_chart = generate_strategy_comparison_chart(results)
-    
     return render_template('strategies.html', 
-                          results=results,
-                          comparison_chart=comparison_chart,
+                          results=comparison['results'],
+                          comparison_chart=comparison['comparison_chart'],
+                          comparison_series=comparison['comparison_series'],
+                          computed_at=datetime.fromtimestamp(comparison['computed_at']),
                           extra_payment=extra_payment)
 
 @app.route('/export_data/<int:debt_id>')
@@ -283,24 +486,58 @@ def export_data(debt_id):
     
     strategy = request.args.get('strategy', 'minimum')
     
-    # Generate payment plan
-    plan_df = debt_manager.generate_payment_plan(debt_id, strategy)
+    # Generate payment plan CSV
+    export, job = run_job('export', debt_id=debt_id, strategy=strategy)
     
-    if plan_df.empty:
+    if export is None:
+        return job_response(job)
+    
+    if not export:
         flash('Unable to generate payment plan for export', 'danger')
         return redirect(url_for('view_debt', debt_id=debt_id))
     
-    # Convert to CSV
-    csv_data = plan_df.to_csv(index=False)
-    
     # Create response
-    from flask import Response
     return Response(
-        csv_data,
+        export['csv'],
         mimetype="text/csv",
         headers={"Content-disposition": f"attachment; filename=payment_plan_{debt.name}_{strategy}.csv"}
     )
 
+@app.route('/export_debts')
+def export_debts():
+    """Stream all debts as CSV without loading the table into memory"""
+    # Checked up front: iter_debts only validates once streaming has begun
+    order_by = request.args.get('order_by', 'id')
+    if order_by not in DEBT_ORDERINGS:
+        return jsonify({'error': f"Unknown order_by {order_by}, expected one of {', '.join(DEBT_ORDERINGS)}"}), 400
+    
+    rows = ((debt.id, debt.name, debt.principal, debt.interest_rate, debt.min_payment,
+             debt.total_paid, debt.current_balance, debt.creation_date)
+            for debt in debt_manager.iter_debts(order_by=order_by))
+    header = ['ID', 'Name', 'Principal', 'Interest Rate', 'Min Payment', 'Total Paid', 'Balance', 'Created']
+    
+    return Response(
+        stream_with_context(stream_csv(header, rows)),
+        mimetype="text/csv",
+        headers={"Content-disposition": "attachment; filename=debts.csv"}
+    )
+
+@app.route('/export_payments')
+def export_payments():
+    """Stream payments as CSV, optionally for one debt and date range"""
+    debt_id = request.args.get('debt_id', type=int)
+    payments = debt_manager.iter_payments(debt_id=debt_id,
+                                          since=request.args.get('since'),
+                                          until=request.args.get('until'))
+    rows = ((payment.id, payment.debt_id, payment.amount, payment.payment_date) for payment in payments)
+    filename = f"payments_{debt_id}.csv" if debt_id else "payments.csv"
+    
+    return Response(
+        stream_with_context(stream_csv(['ID', 'Debt ID', 'Amount', 'Date'], rows)),
+        mimetype="text/csv",
+        headers={"Content-disposition": f"attachment; filename={filename}"}
+    )
+
 @app.route('/dashboard')
 def dashboard():
     """Dashboard with overview of all debts"""
@@ -310,42 +547,341 @@ def dashboard():
         flash('No debts found', 'warning')
         return redirect(url_for('index'))
     
-    # Generate dashboard charts
-    debt_distribution_chart = generate_debt_distribution_chart(debts)
-    interest_comparison_chart = generate_interest_comparison_chart(debts)
+    # Charts and payoff horizons are the expensive part
+    overview, job = run_job('dashboard')
     
-    # Calculate totals
-    total_balance = sum(debt.current_balance for debt in debts)
-    total_min_payment = sum(debt.min_payment for debt in debts)
+    if overview is None:
+        return job_response(job)
     
-    # Calculate minimum vs. accelerated payoff time
-    min_months = max([len(debt_manager.generate_payment_plan(debt.id, "minimum")) 
-                      for debt in debts]) if debts else 0
-    acc_months = max([len(debt_manager.generate_payment_plan(debt.id, "accelerated")) 
-                      for debt in debts]) if debts else 0
+    # Calculate totals
+    totals = debt_manager.get_portfolio_totals()
+    total_balance = totals['total_balance']
+    total_min_payment = totals['total_min_payment']
     
     return render_template('dashboard.html',
                           debts=debts,
-                          debt_distribution_chart=debt_distribution_chart,
-                          interest_comparison_chart=interest_comparison_chart,
+                          debt_distribution_chart=overview['debt_distribution_chart'],
+                          interest_comparison_chart=overview['interest_comparison_chart'],
+                          distribution_series=overview['distribution_series'],
+                          interest_rate_series=overview['interest_rate_series'],
                           total_balance=total_balance,
                           total_min_payment=total_min_payment,
-                          min_months=min_months,
-                          acc_months=acc_months)
+                          min_months=overview['min_months'],
+                          acc_months=overview['acc_months'],
+                          computed_at=datetime.fromtimestamp(overview['computed_at']))
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a background job; pass ?wait=<seconds> to block until it finishes"""
+    if job_queue is None:
+        return jsonify({'error': 'Job queue is not enabled'}), 404
+    
+    wait = request.args.get('wait', type=float)
+    job = job_queue.wait(job_id, timeout=min(wait, 30)) if wait else job_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    
+    return jsonify(job)
+
+def run_job(kind, **params):
+    """Run a heavy computation inline, or through the job queue when enabled
+    
+    Returns (result, job). With the queue enabled, result is None until the
+    job has finished; callers then answer with job_response(job). A request
+    may pass ?wait=<seconds> to block briefly for the result.
+    """
+    if job_queue is None:
+        return JOB_FUNCTIONS[kind](**params), None
+    
+    job = job_queue.submit(kind, params, fingerprint=portfolio_fingerprint(debt_manager.db_path))
+    
+    wait = request.args.get('wait', type=float)
+    if job['status'] in ('queued', 'running') and wait:
+        job = job_queue.wait(job['id'], timeout=min(wait, 30))
+    
+    if job['status'] == 'done':
+        return job['result'], job
+    
+    return None, job
+
+def job_response(job):
+    """Answer with a job handle while the computation runs in the background"""
+    if job['status'] == 'failed':
+        return jsonify(job), 500
+    
+    poll_url = url_for('job_status', job_id=job['id'])
+    body = {'id': job['id'], 'kind': job['kind'], 'status': job['status'], 'poll_url': poll_url}
+    return jsonify(body), 202, {'Location': poll_url}
+
+# Background job functions; they return JSON-serializable results so they can
+# run in a worker process and be cached in the jobs table
+def compute_payment_plan(debt_id, strategy):
+    """Payment plan summary, chart and table for one debt"""
+    debt = debt_manager.get_debt(debt_id)
+    if not debt:
+        return {}
+    
+    plan_df = debt_manager.scheduled_payment_plan(debt, strategy)
+    if plan_df.empty:
+        return {}
+    
+    return {
+        'months_to_payoff': len(plan_df),
+        'total_interest': float(plan_df['Interest'].sum()),
+        'total_payments': float(plan_df['Payment'].sum()),
+        'plan_chart': generate_payment_plan_chart(plan_df, debt.name) if SERVER_CHARTS else None,
+        'plan_series': plan_series(plan_df, MAX_CHART_POINTS),
+        # Convert plan to HTML table (limited to first 24 months for display)
+        'plan_table': plan_df.head(24).to_html(classes='table table-dark table-hover', index=False)
+    }
+
+def compute_strategy_comparison(extra_payment):
+    """Avalanche vs snowball comparison and its chart"""
+    if projection_scheduler is not None:
+        # Precomputed comparison, falling back to a live one if the debts changed
+        comparison = projection_scheduler.get_strategy_comparison(extra_payment)
+        results, computed_at = comparison['result'], comparison['computed_at']
+    else:
+        results, computed_at = debt_manager.compare_payoff_strategies(extra_payment), time.time()
+    
+    if not results:
+        return {}
+    
+    return {
+        'results': results,
+        'comparison_chart': generate_strategy_comparison_chart(results) if SERVER_CHARTS else None,
+        'comparison_series': strategy_series(results),
+        'computed_at': computed_at
+    }
+
+def compute_export(debt_id, strategy):
+    """Payment plan for one debt rendered as CSV"""
+    debt = debt_manager.get_debt(debt_id)
+    if not debt:
+        return {}
+    
+    plan_df = debt_manager.scheduled_payment_plan(debt, strategy)
+    if plan_df.empty:
+        return {}
+    
+    return {'csv': plan_df.to_csv(index=False)}
+
+def compute_dashboard():
+    """Dashboard charts and the minimum vs. accelerated payoff horizons"""
+    debts = debt_manager.get_all_debts()
+    if not debts:
+        return {}
+    
+    # Generate dashboard charts from whole columns rather than Debt objects
+    columns = debt_manager.get_all_debts_columnar()
+    
+    if projection_scheduler is not None:
+        # Precomputed payoff horizons, recomputed live only for changed debts
+        minimum = projection_scheduler.get_debt_projections(debts, "minimum")
+        accelerated = projection_scheduler.get_debt_projections(debts, "accelerated")
+        min_months = max(projection['months'] for projection in minimum)
+        acc_months = max(projection['months'] for projection in accelerated)
+        computed_at = min(projection['computed_at'] for projection in minimum + accelerated)
+    else:
+        min_months = max(len(debt_manager.build_payment_plan(debt, "minimum")) for debt in debts)
+        acc_months = max(len(debt_manager.build_payment_plan(debt, "accelerated")) for debt in debts)
+        computed_at = time.time()
+    
+    return {
+        'debt_distribution_chart': generate_debt_distribution_chart(columns) if SERVER_CHARTS else None,
+        'interest_comparison_chart': generate_interest_comparison_chart(columns) if SERVER_CHARTS else None,
+        'distribution_series': distribution_series(columns),
+        'interest_rate_series': interest_rate_series(columns),
+        'min_months': min_months,
+        'acc_months': acc_months,
+        'computed_at': computed_at
+    }
+
+JOB_FUNCTIONS = {
+    'payment_plan': compute_payment_plan,
+    'strategies': compute_strategy_comparison,
+    'export': compute_export,
+    'dashboard': compute_dashboard
+}
+
+# Optional background job queue for the heavy pages (set DEBT_JOB_QUEUE=1)
+job_queue = None
+if os.environ.get('DEBT_JOB_QUEUE') == '1':
+    job_queue = JobQueue(os.environ.get('DEBT_JOB_DB', 'jobs.db'),
+                         retention=float(os.environ.get('DEBT_JOB_RETENTION', '86400')))
+    for kind, func in JOB_FUNCTIONS.items():
+        job_queue.register(kind, func)
+
+# Optional scheduled precomputation of projections, e.g. DEBT_PRECOMPUTE_AT=02:00
+# for a nightly run, DEBT_PRECOMPUTE_INTERVAL=<seconds> or
+# DEBT_PRECOMPUTE_AFTER_WRITES=<count>
+projection_scheduler = None
+if any(os.environ.get(name) for name in ('DEBT_PRECOMPUTE_AT', 'DEBT_PRECOMPUTE_INTERVAL',
+                                         'DEBT_PRECOMPUTE_AFTER_WRITES')):
+    projection_scheduler = ProjectionScheduler(
+        debt_manager,
+        interval=float(os.environ['DEBT_PRECOMPUTE_INTERVAL']) if os.environ.get('DEBT_PRECOMPUTE_INTERVAL') else None,
+        nightly_at=os.environ.get('DEBT_PRECOMPUTE_AT') or None,
+        after_writes=int(os.environ['DEBT_PRECOMPUTE_AFTER_WRITES']) if os.environ.get('DEBT_PRECOMPUTE_AFTER_WRITES') else None
+    )
+    projection_scheduler.start()
+
+# Optional posting of recurring payments, e.g. DEBT_AUTOPAY_INTERVAL=3600 to
+# post whatever is due once an hour (and at startup)
+autopay_scheduler = None
+if os.environ.get('DEBT_AUTOPAY_INTERVAL'):
+    autopay_scheduler = AutopayScheduler(debt_manager, interval=float(os.environ['DEBT_AUTOPAY_INTERVAL']))
+    autopay_scheduler.start()
+
+def stream_csv(header, rows, chunk_rows=500):
+    """Yield CSV text in chunks of chunk_rows rows"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    
+    yield buf.getvalue()
+
+# Chart series for client-side rendering
+@app.route('/api/series/debt/<int:debt_id>/plan')
+def plan_chart_series(debt_id):
+    """Balance and cumulative payment/interest series for a debt's payment plan"""
+    debt = debt_manager.get_debt(debt_id)
+    if not debt:
+        return jsonify({'error': f'Debt {debt_id} not found'}), 404
+    
+    strategy = request.args.get('strategy', 'minimum')
+    plan_df = debt_manager.scheduled_payment_plan(debt, strategy)
+    return jsonify(plan_series(plan_df, request.args.get('max_points', MAX_CHART_POINTS, type=int)))
+
+@app.route('/api/series/debt/<int:debt_id>/history')
+def history_chart_series(debt_id):
+    """Monthly or weekly payment totals for a debt"""
+    period = request.args.get('period', 'month')
+    if period not in ('month', 'week'):
+        return jsonify({'error': f'Unknown period {period}'}), 400
+    
+    rollups = debt_manager.get_payment_rollups(debt_id, period)
+    return jsonify(history_series(rollups, request.args.get('max_points', MAX_CHART_POINTS, type=int)))
+
+@app.route('/api/series/distribution')
+def distribution_chart_series():
+    """Balance per debt and its share of the portfolio"""
+    return jsonify(distribution_series(debt_manager.get_all_debts_columnar()))
+
+@app.route('/api/series/interest_rates')
+def interest_rate_chart_series():
+    """Debts ordered by interest rate"""
+    return jsonify(interest_rate_series(debt_manager.get_all_debts_columnar()))
+
+@app.route('/api/series/strategies')
+def strategy_chart_series():
+    """Months and interest for the avalanche and snowball strategies"""
+    extra_payment = request.args.get('extra_payment', 0, type=float)
+    if projection_scheduler is not None:
+        results = projection_scheduler.get_strategy_comparison(extra_payment)['result']
+    else:
+        results = debt_manager.compare_payoff_strategies(extra_payment)
+    
+    if not results:
+        return jsonify({'error': 'No debts found'}), 404
+    
+    return jsonify(strategy_series(results))
+
+@app.route('/api/scenarios', methods=['POST'])
+def scenario_comparison():
+    """Compare what-if scenarios side by side without writing anything
+
+    The body is {"extra_payment": 0, "scenarios": {"name": [change, ...]}}
+    with changes such as {"op": "add_debt", "name": "Car", "principal": 10000,
+    "interest_rate": 7, "min_payment": 200} or {"op": "pay", "debt_id": 3,
+    "amount": 3000}. The current portfolio is included first as "baseline".
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    requested = body.get('scenarios') or {}
+    if not isinstance(requested, dict) or not all(isinstance(changes, list) for changes in requested.values()):
+        return jsonify({'error': 'scenarios must map each scenario name to a list of changes'}), 400
+    
+    try:
+        extra_payment = float(body.get('extra_payment', 0))
+        base = ScenarioBase(debt_manager)
+        scenarios = [base.scenario('baseline')]
+        for name, changes in requested.items():
+            scenarios.append(base.scenario(name).apply(changes))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(compare_scenarios(scenarios, extra_payment))
+
+@app.route('/api/debts/<int:debt_id>/autopay', methods=['GET', 'POST'])
+def debt_autopay(debt_id):
+    """List or add a debt's recurring payments
+
+    POST {"amount": 150, "cadence": "monthly", "start_date": "2024-05-01",
+    "end_date": null}; without an amount each payment is the debt's minimum
+    payment on its due date.
+    """
+    if not debt_manager.get_debt(debt_id):
+        return jsonify({'error': f'Debt with ID {debt_id} not found'}), 404
+    
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        try:
+            schedule = RecurringPayment(
+                id=None,
+                debt_id=debt_id,
+                amount=float(body['amount']) if body.get('amount') is not None else None,
+                cadence=body.get('cadence', 'monthly'),
+                end_date=body.get('end_date')
+            )
+            if body.get('start_date'):
+                schedule.start_date = body['start_date']
+            schedule.id = debt_manager.add_recurring_payment(schedule)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(asdict(schedule)), 201
+    
+    return jsonify([asdict(schedule) for schedule in debt_manager.get_recurring_payments(debt_id)])
+
+@app.route('/api/autopay/<int:schedule_id>/cancel', methods=['POST'])
+def cancel_autopay(schedule_id):
+    """Stop a recurring payment; payments already posted stay"""
+    if not debt_manager.cancel_recurring_payment(schedule_id):
+        return jsonify({'error': f'Recurring payment {schedule_id} not found'}), 404
+    return jsonify({'id': schedule_id, 'cancelled': True})
+
+# Upper bound on points drawn per chart series; longer series are downsampled
+MAX_CHART_POINTS = 120
+
+# Individual payments listed on the debt page
+RECENT_PAYMENTS = 50
 
 # Helper functions for generating charts
-def generate_payment_history_chart(payments):
-    """Generate a payment history chart"""
+def generate_payment_history_chart(rollups):
+    """Generate a payment history chart from get_payment_rollups() output"""
     fig = Figure(figsize=(8, 4))
     ax = fig.add_subplot(1, 1, 1)
     
-    dates = [payment.payment_date for payment in payments]
-    amounts = [payment.amount for payment in payments]
+    dates = rollups['period_start']
+    amounts = rollups['total_amount']
+    
+    # Keep rendering cost bounded however long the history is
+    days = dates.astype(np.int64)
+    keep = lttb(days, amounts, MAX_CHART_POINTS)
     
-    # Convert dates to datetime objects for plotting
-    dates = [datetime.strptime(date, '%Y-%m-%d') for date in dates]
+    # Bars fill most of the gap between the periods that are drawn
+    width = 0.8 * float(np.median(np.diff(days[keep]))) if len(keep) > 1 else 20
     
-    ax.bar(dates, amounts, color='#6d28d9')
+    ax.bar(dates[keep].astype('datetime64[ms]').astype(datetime), amounts[keep], color='#6d28d9', width=width)
     ax.set_xlabel('Date')
     ax.set_ylabel('Amount ($)')
     ax.set_title('Payment History')
@@ -383,11 +919,11 @@ def generate_payment_plan_chart(plan_df, debt_name):
     ax.plot(plan_df['Month'], plan_df['Balance'], label='Balance', color='#ef4444')
     
     # Plot cumulative payments
-    cumulative_payments = [sum(plan_df['Payment'][:i+1]) for i in range(len(plan_df))]
+    cumulative_payments = plan_df['Payment'].cumsum()
     ax.plot(plan_df['Month'], cumulative_payments, label='Payments Made', color='#10b981')
     
     # Plot cumulative interest
-    cumulative_interest = [sum(plan_df['Interest'][:i+1]) for i in range(len(plan_df))]
+    cumulative_interest = plan_df['Interest'].cumsum()
     ax.plot(plan_df['Month'], cumulative_interest, label='Interest Paid', color='#f59e0b')
     
     ax.set_title(f'Debt Payoff Plan: {debt_name}')
@@ -422,9 +958,10 @@ def generate_strategy_comparison_chart(results):
     ax = fig.add_subplot(1, 1, 1)
     
     # Extract data
-    strategies = ['Avalanche', 'Snowball']
-    months = [results['avalanche']['months'], results['snowball']['months']]
-    interest = [results['avalanche']['interest_paid'], results['snowball']['interest_paid']]
+    series = strategy_series(results)
+    strategies = series['strategy']
+    months = series['months']
+    interest = series['interest_paid']
     
     # Create grouped bar chart
     x = np.arange(len(strategies))
@@ -461,17 +998,17 @@ def generate_strategy_comparison_chart(results):
     
     return string
 
-def generate_debt_distribution_chart(debts):
-    """Generate a pie chart of debt distribution"""
-    if not debts:
+def generate_debt_distribution_chart(columns):
+    """Generate a pie chart of debt distribution from get_all_debts_columnar() output"""
+    if len(columns['id']) == 0:
         return None
         
     fig = Figure(figsize=(6, 6))
     ax = fig.add_subplot(1, 1, 1)
     
     # Extract data
-    debt_names = [debt.name for debt in debts]
-    balances = [debt.current_balance for debt in debts]
+    debt_names = list(columns['name'])
+    balances = columns['current_balance']
     
     # Colors
     colors = ['#3b82f6', '#10b981', '#f59e0b', '#6d28d9', '#ef4444', 
@@ -483,7 +1020,7 @@ def generate_debt_distribution_chart(debts):
         labels=None,
         autopct='%1.1f%%',
         startangle=90,
-        colors=colors[:len(debts)]
+        colors=colors[:len(debt_names)]
     )
     
     # Style autotexts
@@ -507,19 +1044,15 @@ def generate_debt_distribution_chart(debts):
     
     return string
 
-def generate_interest_comparison_chart(debts):
-    """Generate a bar chart comparing interest rates"""
+def generate_interest_comparison_chart(columns):
+    """Generate a bar chart comparing interest rates from get_all_debts_columnar() output"""
     fig = Figure(figsize=(8, 5))
     ax = fig.add_subplot(1, 1, 1)
     
-    # Extract data
-    debt_names = [debt.name for debt in debts]
-    interest_rates = [debt.interest_rate for debt in debts]
-    
     # Sort by interest rate for better visualization
-    sorted_data = sorted(zip(debt_names, interest_rates), key=lambda x: x[1], reverse=True)
-    debt_names = [item[0] for item in sorted_data]
-    interest_rates = [item[1] for item in sorted_data]
+    order = np.argsort(-columns['interest_rate'], kind='stable')
+    debt_names = list(columns['name'][order])
+    interest_rates = columns['interest_rate'][order].tolist()
     
     # Create horizontal bar chart
     ax.barh(debt_names, interest_rates, color='#6d28d9')
@@ -0,0 +1,181 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+
+class PaymentWriteQueue:
+    """Write-behind queue that funnels payments and debt updates through one writer thread
+
+    The writer collects queued operations for up to ``max_latency`` seconds (or
+    until ``max_batch_size`` operations are waiting) and applies them in a single
+    transaction, so a burst of payments costs one commit instead of one per
+    payment. Futures are resolved only after the commit succeeds.
+
+    Rows are written by the DebtManager's own _write_payment and
+    _write_update, so queued writes check idempotency keys (archived
+    payments included) and fill the cents columns exactly like direct ones.
+    """
+
+    def __init__(self, manager, max_batch_size=500, max_latency=0.005):
+        self.manager = manager
+        self.db_path = manager.db_path
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # Throughput counters
+        self.payments_written = 0
+        self.updates_written = 0
+        self.batches_committed = 0
+        self.commit_time = 0.0
+        self.started_at = time.time()
+
+        self._thread = threading.Thread(target=self._run, name="payment-writer", daemon=True)
+        self._thread.start()
+
+    def submit_payment(self, payment) -> Future:
+        """Queue a payment; the future resolves with the new payment ID"""
+        return self._submit("payment", payment)
+
+    def submit_debt_update(self, debt) -> Future:
+        """Queue a debt update; the future resolves with True if a row changed"""
+        return self._submit("update", debt)
+
+    def flush(self):
+        """Block until everything queued so far has been committed"""
+        self._submit("flush", None).result()
+
+    def close(self):
+        """Drain the queue, commit outstanding work and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def payments_per_second(self) -> float:
+        """Committed payments per second of wall-clock time since start"""
+        elapsed = time.time() - self.started_at
+        return self.payments_written / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        """Return throughput and batching statistics"""
+        batches = self.batches_committed
+        return {
+            'payments_written': self.payments_written,
+            'updates_written': self.updates_written,
+            'batches_committed': batches,
+            'avg_batch_size': (self.payments_written + self.updates_written) / batches if batches else 0.0,
+            'commit_time': self.commit_time,
+            'payments_per_second': self.payments_per_second,
+            'pending': self._queue.qsize()
+        }
+
+    def _submit(self, kind, item) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed")
+            self._queue.put((kind, item, future))
+        return future
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+
+        while not stopping:
+            op = self._queue.get()
+            if op is None:
+                break
+
+            # Collect a batch until it is full or the latency window closes
+            batch = [op]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                batch.append(op)
+
+            self._commit_batch(conn, batch)
+
+        # Anything that raced in after the stop sentinel still gets written
+        leftovers = []
+        while True:
+            try:
+                op = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is not None:
+                leftovers.append(op)
+        if leftovers:
+            self._commit_batch(conn, leftovers)
+
+        conn.close()
+
+    def _commit_batch(self, conn, batch):
+        start_time = time.time()
+        cursor = conn.cursor()
+        results = []
+        payments = 0
+        updates = 0
+
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for kind, item, future in batch:
+                # A savepoint per operation keeps one bad row from failing the batch
+                cursor.execute('SAVEPOINT op')
+                try:
+                    if kind == "payment":
+                        result, created = self.manager._write_payment(cursor, item)
+                        payments += created
+                    elif kind == "update":
+                        result = self.manager._write_update(cursor, item)
+                        updates += 1
+                    else:
+                        result = None
+                    cursor.execute('RELEASE SAVEPOINT op')
+                    results.append((future, result, None))
+                except Exception as e:
+                    # Only this operation fails; the writer thread keeps serving the queue
+                    cursor.execute('ROLLBACK TO SAVEPOINT op')
+                    cursor.execute('RELEASE SAVEPOINT op')
+                    results.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for kind, item, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.payments_written += payments
+        self.updates_written += updates
+        self.batches_committed += 1
+        self.commit_time += time.time() - start_time
+
+        # Resolve futures only once the batch is durable
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,62 @@
+import random
+import sqlite3
+import time
+
+# Retry budget for writes that find the database locked: attempts back off
+# exponentially from BASE_DELAY up to MAX_DELAY, each with full jitter so
+# contending writers spread out instead of retrying in lockstep
+MAX_ATTEMPTS = 8
+BASE_DELAY = 0.005
+MAX_DELAY = 0.5
+
+# How long one attempt waits on SQLite's own busy handler before backing off
+BUSY_TIMEOUT = 1.0
+
+
+def is_busy(error: Exception) -> bool:
+    """Whether an error means another connection holds the lock"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+def backoff_delay(attempt: int, base_delay=BASE_DELAY, max_delay=MAX_DELAY) -> float:
+    """Full-jitter exponential backoff for a zero-based attempt number"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def retry_busy(operation, attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Call operation(), retrying with backoff while the database is busy"""
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == attempts - 1:
+                raise
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+
+def write_with_retry(connect, write, attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Run write(cursor) in a BEGIN IMMEDIATE transaction and commit it
+
+    ``connect`` is called for a fresh connection on every attempt. Taking the
+    write lock up front means a transaction never fails halfway because a
+    reader became a writer; if the lock stays busy past the busy timeout the
+    whole transaction is rolled back and retried with backoff, so ``write``
+    must only touch the database.
+    """
+    def attempt():
+        conn = connect()
+        conn.isolation_level = None
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            result = write(conn.cursor())
+            conn.execute('COMMIT')
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    return retry_busy(attempt, attempts, base_delay, max_delay)